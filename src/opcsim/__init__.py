@@ -8,9 +8,11 @@ import os
 
 from .distributions import *
 from .models import *
+from .grids import *
 from .plots import *
 from .utils import *
 from .metrics import *
+from .simulate import *
 from .mie import *
 from .rc_style import set
 
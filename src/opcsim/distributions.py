@@ -3,6 +3,7 @@
 """
 from .equations.pdf import *
 from .equations.cdf import *
+from .equations.cdf import moments as _moments
 from .utils import k_kohler, rho_eff, RHO_H20
 
 DISTRIBUTION_DATA = {
@@ -43,45 +44,6 @@ DISTRIBUTION_DATA = {
         ],
 }
 
-def _get_pdf_func(base, weight, dp, n, gm, gsd, rho=1.):
-    """"""
-    weight  = weight.lower()
-
-    if weight not in ['number', 'surface', 'volume', 'mass']:
-        raise Exception("Invalid argument for weight: ['number', 'surface', 'volume', 'mass']")
-
-    if base not in [None, 'none', 'log', 'log10']:
-        raise Exception("Invalid argument for base: ['none', 'log', 'log10']")
-
-    if base == 'none' or base == None:
-        if weight == 'number':
-            return dn_ddp(dp, n, gm, gsd)
-        elif weight == 'surface':
-            return ds_ddp(dp, n, gm, gsd)
-        elif weight == 'volume':
-            return dv_ddp(dp, n, gm, gsd)
-        elif weight == 'mass':
-            return dv_ddp(dp, n, gm, gsd) * rho * 1e-6
-    elif base == 'log':
-        if weight == 'number':
-            return dn_dlndp(dp, n, gm, gsd)
-        elif weight == 'surface':
-            return ds_dlndp(dp, n, gm, gsd)
-        elif weight == 'volume':
-            return dv_dlndp(dp, n, gm, gsd)
-        elif weight == 'mass':
-            return dv_dlndp(dp, n, gm, gsd) * rho *1e-6
-    elif base == 'log10':
-        if weight == 'number':
-            return dn_dlogdp(dp, n, gm, gsd)
-        elif weight == 'surface':
-            return ds_dlogdp(dp, n, gm, gsd)
-        elif weight == 'volume':
-            return dv_dlogdp(dp, n, gm, gsd)
-        elif weight == 'mass':
-            return dv_dlogdp(dp, n, gm, gsd) * rho * 1e-6
-
-
 def _get_cdf_func(n, gm, gsd, dmin=None, dmax=10., weight='number', rho=1.):
     """"""
     weight = weight.lower()
@@ -133,6 +95,169 @@ def load_distribution(label):
     return _tmp
 
 
+_COLUMNS = ("N", "GM", "GSD", "kappa", "rho", "refr")
+
+
+class _Mode(dict):
+    """A dict of the parameters of a single mode of an AerosolDistribution.
+
+    Setting a key also writes it to the underlying column arrays of the 
+    distribution; keys cannot be added or removed.
+    """
+    def __init__(self, distribution, index):
+        super(_Mode, self).__init__(label=distribution._labels[index], 
+            **{k: distribution._columns[k][index].item() for k in _COLUMNS})
+
+        self._distribution = distribution
+        self._index = index
+
+    def __setitem__(self, key, value):
+        if key == "label":
+            self._distribution._labels[self._index] = value
+            self._distribution._reindex()
+        elif key in _COLUMNS:
+            self._distribution._columns[key][self._index] = value
+            value = self._distribution._columns[key][self._index].item()
+        else:
+            raise KeyError(key)
+
+        super(_Mode, self).__setitem__(key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("The keys of a mode cannot be removed.")
+
+    __delitem__ = pop = popitem = clear = _immutable
+
+
+class _ModeList(list):
+    """The list of modes of an AerosolDistribution; modes can only be added with 
+    :meth:`AerosolDistribution.add_mode`."""
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Modes cannot be added, removed, or reordered in place; "
+                        "use AerosolDistribution.add_mode to add a mode.")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+
+class PDFEvaluator(object):
+    """A multi-modal lognormal PDF with every constant precomputed.
+
+    Every PDF in :mod:`opcsim.equations.pdf` can be written as
+
+    .. math::
+
+        f(D_p)=\\sum_i exp\\Big(a_i + p\\,lnD_p - \\frac{(lnD_p - lnD̄_{pi})^2}{2ln^2σ_i}\\Big)
+
+    where the power :math:`p` depends on the base and weight, and :math:`a_i` 
+    holds the number of particles and all of the normalization constants of 
+    each mode. The constants are computed once, so evaluating the PDF only 
+    takes one logarithm per diameter and one exponential per diameter and mode. 
+    Evaluators are usually created with :meth:`AerosolDistribution.pdf_evaluator`.
+    """
+    def __init__(self, n, gm, gsd, base='log10', weight='number', rho=1.):
+        """
+
+        Parameters
+        ----------
+        n : array of floats
+            The total number of particles (#/cc) of each mode; modes are on the 
+            last axis and any leading axes are kept (e.g. for an ensemble).
+        gm : array of floats
+            The median particle diameter (Geometric Mean) of each mode in microns.
+        gsd : array of floats
+            The geometric standard deviation of each mode.
+        base : {None | 'none' | 'log' | 'log10'}
+            Base algorithm to use. Default is 'log10'
+        weight : {'number' | 'surface' | 'volume' | 'mass'}
+            Choose how to weight the pdf. Default is `number`.
+        rho: float or array of floats
+            The particle density of each mode (only used for `mass`). Default is 1.
+
+        Returns
+        -------
+        PDFEvaluator
+            An instance of the opcsim.PDFEvaluator class
+
+        Examples
+        --------
+
+        >>> f = opcsim.PDFEvaluator([1e3, 10.], [0.1, 1.], [1.5, 1.8], base='log10')
+        >>> vals = f(np.logspace(-2, 1, 1000000))
+
+        """
+        weight = weight.lower()
+
+        if weight not in ['number', 'surface', 'volume', 'mass']:
+            raise Exception("Invalid argument for weight: ['number', 'surface', 'volume', 'mass']")
+
+        if base not in [None, 'none', 'log', 'log10']:
+            raise Exception("Invalid argument for base: ['none', 'log', 'log10']")
+
+        self.base = base
+        self.weight = weight
+
+        n, gm, gsd, rho = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (n, gm, gsd, rho)])
+
+        s = np.log(gsd)
+
+        # dN/dDp = N / (sqrt(2pi) Dp ln(gsd)) * exp(...)
+        power = -1
+        with np.errstate(divide="ignore"):
+            a = np.log(n) - np.log(np.sqrt(2*np.pi) * s)
+
+        # d/dlnDp = Dp * d/dDp and d/dlogDp = ln(10) * Dp * d/dDp
+        if base in ['log', 'log10']:
+            power += 1
+
+        if base == 'log10':
+            a = a + np.log(np.log(10))
+
+        if weight == 'surface':
+            power += 2
+            a = a + np.log(np.pi)
+        elif weight in ['volume', 'mass']:
+            power += 3
+            a = a + np.log(np.pi / 6.)
+
+        if weight == 'mass':
+            a = a + np.log(rho * 1e-6)
+
+        self._power = power
+        self._a = a
+        self._mu = np.log(gm)
+        self._h = 1. / (2 * s**2)
+
+    def __call__(self, dp):
+        """Evaluate the PDF at particle diameter(s) `dp` (um).
+
+        Returns
+        -------
+        float or array of floats
+            The evaluated PDF with the leading (non-mode) shape of the parameters 
+            followed by the shape of `dp`.
+        """
+        x = np.log(np.asarray(dp, dtype=float))
+
+        shape = self._a.shape + (1, )*x.ndim
+        a, mu, h = (each.reshape(shape) for each in (self._a, self._mu, self._h))
+
+        return np.exp(a + self._power*x - h*(x - mu)**2).sum(axis=self._a.ndim - 1)
+
+    def __repr__(self): # pragma: no cover
+        return "PDFEvaluator: {} weighted, base={} ({} modes)".format(self.weight, self.base, self._a.shape[-1])
+
+
 class AerosolDistribution(object):
     """Define an aerosol distribution.
 
@@ -164,15 +289,75 @@ class AerosolDistribution(object):
 
         """
         self.label = label
-        self.modes = []
+
+        # every mode parameter is stored as a column array with one value per mode
+        self._labels = []
+        self._columns = {k: np.zeros(0, dtype=complex if k == "refr" else float) for k in _COLUMNS}
+        self._modes = _ModeList()
+        self._reindex()
+
+    @property
+    def modes(self):
+        """The list of modes, each a dict with keys `label`, `N`, `GM`, `GSD`, `kappa`, 
+        `rho`, and `refr`.
+
+        Setting a key of a mode (e.g. ``d.modes[0]["N"] = 1e3``) updates the 
+        distribution. The list itself is read-only: modes must be added with 
+        :meth:`AerosolDistribution.add_mode`.
+        """
+        return self._modes
+
+    def __getstate__(self):
+        # the modes refer back to the distribution, so they are rebuilt from the columns
+        state = self.__dict__.copy()
+        del state["_modes"]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._modes = _ModeList(_Mode(self, i) for i in range(len(self._labels)))
+
+    def _reindex(self):
+        """Rebuild the case-insensitive lookup of mode labels."""
+        self._lookup = dict()
+        for i, label in enumerate(self._labels):
+            self._lookup.setdefault(label.lower(), i)
 
     def _get_mode(self, label):
         """Return the mode with label=`label`. """
-        for mode in self.modes:
-            if mode['label'].lower() == label.lower():
-                return mode
+        i = self._lookup.get(label.lower())
+
+        return None if i is None else self._modes[i]
+
+    def _params(self, mode=None, rh=0., rho=None, ndim=0):
+        """Return the number, wet GM, GSD, and wet density of the selected modes 
+        as arrays with shape (n_modes, ) + (1, )*`ndim` so they broadcast against 
+        an array of diameters with `ndim` dimensions."""
+        if mode is not None:
+            if mode.lower() not in self._lookup:
+                raise ValueError("Invalid mode: {}".format(mode))
+
+            idx = [self._lookup[mode.lower()]]
+        else:
+            idx = slice(None)
+
+        gm_dry = self._columns["GM"][idx]
+
+        # calculate the wet diameter of the particle based on k-kohler theory
+        gm = k_kohler(diam_dry=gm_dry, kappa=self._columns["kappa"][idx], rh=rh)
+
+        # override rho if set
+        rho = np.full_like(gm_dry, rho) if rho else self._columns["rho"][idx]
 
-        return None
+        # calculate the effective density, taking into account hygroscopic growth
+        rho = rho_eff(np.stack([rho, np.full_like(rho, RHO_H20)], axis=-1), 
+                      diams=np.stack([gm_dry, gm - gm_dry], axis=-1))
+
+        shape = (-1, ) + (1, )*ndim
+
+        return (self._columns["N"][idx].reshape(shape), gm.reshape(shape), 
+                self._columns["GSD"][idx].reshape(shape), np.reshape(rho, shape))
 
     def add_mode(self, n, gm, gsd, label=None, kappa=0., rho=1., refr=complex(1.5, 0)):
         """Add a mode to the distribution as defined using N, GM, and GSD. Additionally,
@@ -216,16 +401,15 @@ class AerosolDistribution(object):
         >>> d.add_mode(n=960, gm=0.151, gsd=1.599, label="Mode 3")
 
         """
-        self.modes.append(
-            {
-                'label':label if label else "Mode {}".format(len(self.modes)), 
-                'N':n, 'GM':gm, 
-                'GSD':gsd, 
-                "kappa": kappa, 
-                "rho": rho, 
-                "refr": refr
-                }
-            )
+        values = dict(N=n, GM=gm, GSD=gsd, kappa=kappa, rho=rho, refr=refr)
+
+        for k in _COLUMNS:
+            self._columns[k] = np.append(self._columns[k], values[k])
+
+        self._labels.append(label if label else "Mode {}".format(len(self._labels)))
+        self._reindex()
+
+        list.append(self._modes, _Mode(self, len(self._labels) - 1))
 
     def pdf(self, dp, base='log10', weight='number', mode=None, rh=0., rho=None):
         """Evaluate and return the probability distribution function at
@@ -283,26 +467,50 @@ class AerosolDistribution(object):
         >>> d.pdf(0.1, weight='volume', base='log')
 
         """
-        value = 0.0
+        return self.pdf_evaluator(base=base, weight=weight, mode=mode, rh=rh, rho=rho)(dp)
 
-        if mode is not None:
-            modes = [self._get_mode(mode)]
-        else:
-            modes = self.modes
+    def pdf_evaluator(self, base='log10', weight='number', mode=None, rh=0., rho=None):
+        """Return a callable that evaluates the PDF at any particle diameter(s).
 
-        for mode in modes:
-            # calculate the wet diameter of the particle based on k-kohler theory
-            gm = k_kohler(diam_dry=mode['GM'], kappa=mode["kappa"], rh=rh)
+        All of the constants of every mode are computed once (see 
+        :class:`opcsim.PDFEvaluator`), which makes repeated evaluations (e.g. for 
+        plotting or fitting at high resolution) much cheaper than calling 
+        :meth:`AerosolDistribution.pdf` every time. The evaluator is a snapshot: 
+        it does not change if the modes of the distribution are changed.
 
-            # override rho if set 
-            rho = rho if rho else mode["rho"]
+        Parameters
+        ----------
+        base : {None | 'none' | 'log' | 'log10'}
+            Base algorithm to use. Default is 'log10'
+        weight : {'number' | 'surface' | 'volume' | 'mass'}
+            Choose how to weight the pdf. Default is `number`.
+        mode : string or None
+            Choose to only evaluate the pdf for a single mode
+            of the entire distribution. If set to `None`, the entire
+            distribution will be evaluated.
+        rh: float: optional
+            The relative humidity as a percentage (0-100). Default is 0.
+        rho: float: optional
+            The particle density. If set, this will override the density set 
+            for individual modes.
 
-            # calculate the effective density, taking into account hygroscopic growth
-            rho = rho_eff([rho, RHO_H20], diams=[mode['GM'], gm - mode['GM']])
+        Returns
+        -------
+        PDFEvaluator
 
-            value += _get_pdf_func(base, weight, dp, mode['N'], gm, mode['GSD'], rho)
+        Examples
+        --------
 
-        return value
+        Evaluate dV/dlogDp at 50% RH at a million diameters
+
+        >>> d = opcsim.load_distribution("Urban")
+        >>> f = d.pdf_evaluator(base='log10', weight='volume', rh=50.)
+        >>> vals = f(np.logspace(-3, 1, 1000000))
+
+        """
+        n, gm, gsd, rho = self._params(mode=mode, rh=rh, rho=rho)
+
+        return PDFEvaluator(n, gm, gsd, base=base, weight=weight, rho=rho)
 
     def cdf(self, dmax, dmin=None, weight='number', mode=None, rh=0., rho=None):
         """Evaluate and return the cumulative probability distribution function
@@ -321,10 +529,12 @@ class AerosolDistribution(object):
 
         Parameters
         ----------
-        dmin : float
+        dmin : float or array of floats
             The minimum particle diameter in the integration (um)
-        dmax : float
-            The maximum particle diameter in the integration (um)
+        dmax : float or array of floats
+            The maximum particle diameter in the integration (um). Arrays of 
+            `dmin` and `dmax` are broadcast against each other, so many 
+            ranges (e.g. every bin of a grid) can be integrated in one call.
         weight : {'number' | 'surface' | 'volume' | 'mass'}
             Choose how to weight the pdf. Default is `number`
         mode : string or None
@@ -339,7 +549,7 @@ class AerosolDistribution(object):
 
         Returns
         -------
-        float
+        float or array of floats
             The integrated distribution function representing the total number of
             {particles, surface area, volume} between dmin and dmax.
 
@@ -359,31 +569,380 @@ class AerosolDistribution(object):
 
         >>> d.cdf(dmax=2.5, weight='volume')
 
+        Evaluate the number of particles in every bin of a grid at once
+
+        >>> bounds = np.logspace(-1, 1, 100)
+        >>> n = d.cdf(dmin=bounds[:-1], dmax=bounds[1:])
+
         """
         if dmin is not None:
-            if not dmin < dmax:
+            if np.any(np.asarray(dmin) >= np.asarray(dmax)):
                 raise ValueError("dmin must be less than dmax")
 
-        value = 0.0
+        ndim = np.ndim(dmax) if dmin is None else np.broadcast(dmin, dmax).ndim
 
-        if mode is not None:
-            modes = [self._get_mode(mode)]
-        else:
-            modes = self.modes
+        n, gm, gsd, rho = self._params(mode=mode, rh=rh, rho=rho, ndim=ndim)
+
+        # evaluate every mode at once and sum them
+        return _get_cdf_func(n, gm, gsd, dmin, dmax, weight, rho).sum(axis=0)
+
+    def moments(self, dmin=None, dmax=10., rh=0., mode=None, rho=None):
+        """Evaluate the total number, surface area, volume, and mass of particles 
+        between `dmin` and `dmax` in a single pass.
+
+        This returns the same values as calling :meth:`AerosolDistribution.cdf` 
+        once per weight, but every mode and every weight is computed at once (see 
+        :func:`opcsim.equations.cdf.moments`).
+
+        Parameters
+        ----------
+        dmin : float or array of floats
+            The minimum particle diameter in the integration (um)
+        dmax : float or array of floats
+            The maximum particle diameter in the integration (um). Default is 10. 
+            Arrays of `dmin` and `dmax` are broadcast against each other.
+        rh: float: optional
+            The relative humidity as a percentage (0-100). Default is 0.
+        mode : string or None
+            Choose to only evaluate a single mode of the entire distribution. If 
+            set to `None`, the entire distribution will be evaluated.
+        rho: float: optional
+            The particle density. If set, this will override the density set 
+            for individual modes.
+
+        Returns
+        -------
+        dict
+            The total `number`, `surface`, `volume`, and `mass` between dmin 
+            and dmax, each with the broadcast shape of `dmin` and `dmax`.
+
+        Examples
+        --------
+
+        Compute the number, surface area, volume, and mass under 2.5 microns
+
+        >>> d = opcsim.load_distribution("Urban")
+        >>> m = d.moments(dmax=2.5)
+        >>> m["number"], m["mass"]
 
-        for mode in modes:
-            # calculate the wet diameter of the particle based on k-kohler theory
-            gm = k_kohler(diam_dry=mode['GM'], kappa=mode["kappa"], rh=rh)
+        Compute PM1, PM2.5, and PM10 at 50% RH at once
 
-            # override rho if set
-            rho = rho if rho else mode["rho"]
+        >>> pm1, pm25, pm10 = d.moments(dmax=[1., 2.5, 10.], rh=50.)["mass"]
+
+        """
+        if dmin is not None:
+            if np.any(np.asarray(dmin) >= np.asarray(dmax)):
+                raise ValueError("dmin must be less than dmax")
 
-            # calculate the effective density, taking into account hygroscopic growth
-            rho = rho_eff([rho, RHO_H20], diams=[mode['GM'], gm - mode['GM']])
+        ndim = np.ndim(dmax) if dmin is None else np.broadcast(dmin, dmax).ndim
 
-            value += _get_cdf_func(mode['N'], gm, mode['GSD'], dmin, dmax, weight, rho)
+        n, gm, gsd, rho = self._params(mode=mode, rh=rh, rho=rho, ndim=ndim)
 
-        return value
+        number, surface, volume = _moments(n, gm, gsd, dmin, dmax)
+
+        return dict(number=number.sum(axis=0), surface=surface.sum(axis=0), 
+                    volume=volume.sum(axis=0), mass=(volume*rho).sum(axis=0))
 
     def __repr__(self):
         return "AerosolDistribution: {}".format(self.label)
+
+
+class DistributionEnsemble(object):
+    """A collection of many multi-modal aerosol distributions (e.g. a time series 
+    of fitted distributions) evaluated together.
+
+    Every distribution has the same number of lognormal modes, and the parameters 
+    of all of them are stored as arrays with shape (n_distributions, n_modes), so 
+    no Python object is created per distribution. The ensemble can be used in 
+    place of an AerosolDistribution with :meth:`opcsim.OPC.evaluate`, 
+    :meth:`opcsim.OPC.histogram`, :meth:`opcsim.OPC.integrate`, and 
+    :meth:`opcsim.Nephelometer.evaluate`.
+    """
+    def __init__(self, n, gm, gsd, kappa=0., rho=1., refr=complex(1.5, 0), label=None):
+        """Initialize an ensemble of aerosol distributions.
+
+        Parameters
+        ----------
+        n : array of floats
+            The total number of particles (#/cc) of each mode with shape 
+            (n_distributions, n_modes). A 1-D array is treated as a single mode.
+        gm : array of floats
+            The median particle diameter (Geometric Mean) of each mode in microns 
+            with the same shape as `n`.
+        gsd : array of floats
+            The geometric standard deviation of each mode with the same shape as `n`.
+        kappa: float or array of floats, optional
+            The k-kohler coefficient, either a single value, one per mode, or one 
+            per distribution and mode. Default is 0.
+        rho: float or array of floats, optional
+            The particle density in g/cm3, either a single value, one per mode, or 
+            one per distribution and mode. Default is 1.
+        refr: complex or array of complex, optional
+            The dry complex refractive index, either a single value, one per mode, 
+            or one per distribution and mode. Default is 1.5+0i.
+        label : string, optional
+            Label the ensemble
+
+        Returns
+        -------
+        DistributionEnsemble
+            An instance of the DistributionEnsemble class
+
+        Examples
+        --------
+
+        Build an ensemble of 10,000 bi-modal distributions of ammonium sulfate
+
+        >>> n = np.tile([1e3, 10.], (10000, 1))
+        >>> gm = np.column_stack((np.linspace(0.1, 0.3, 10000), np.full(10000, 1.5)))
+        >>> gsd = np.tile([1.5, 1.8], (10000, 1))
+        >>> e = opcsim.DistributionEnsemble(n, gm, gsd, kappa=0.53, rho=1.77, 
+        ...                                 refr=complex(1.521, 0))
+
+        """
+        self.label = label
+
+        n = np.asarray(n, dtype=float)
+        n = n.reshape(n.shape[0], -1)
+
+        self.n = n
+        self.gm = np.asarray(gm, dtype=float).reshape(n.shape)
+        self.gsd = np.asarray(gsd, dtype=float).reshape(n.shape)
+
+        # scalar and per-mode properties are broadcast (without copying) to every distribution
+        self.kappa = np.broadcast_to(np.asarray(kappa, dtype=float), n.shape)
+        self.rho = np.broadcast_to(np.asarray(rho, dtype=float), n.shape)
+        self.refr = np.broadcast_to(np.asarray(refr, dtype=complex), n.shape)
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        """Build an ensemble from a DataFrame with columns `N_i`, `GM_i`, and `GSD_i` 
+        for every mode `i`; any other keyword arguments are passed on to 
+        :class:`opcsim.DistributionEnsemble`.
+
+        Examples
+        --------
+
+        >>> df = pd.DataFrame({"N_1": [1e3, 2e3], "GM_1": [0.1, 0.12], "GSD_1": [1.5, 1.5]})
+        >>> e = opcsim.DistributionEnsemble.from_dataframe(df, kappa=0.53)
+
+        """
+        labels = [c[2:] for c in df.columns if str(c).startswith("N_")]
+
+        return cls(n=df[["N_{}".format(l) for l in labels]].values, 
+                   gm=df[["GM_{}".format(l) for l in labels]].values, 
+                   gsd=df[["GSD_{}".format(l) for l in labels]].values, **kwargs)
+
+    @property
+    def n_modes(self):
+        """The number of modes of every distribution"""
+        return self.n.shape[1]
+
+    def __len__(self):
+        return self.n.shape[0]
+
+    def __getitem__(self, key):
+        """Return a single distribution as an AerosolDistribution, or a subset of 
+        the ensemble (for slices, masks, or arrays of indices)."""
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            d = AerosolDistribution(self.label)
+
+            for i in range(self.n_modes):
+                d.add_mode(n=self.n[key, i], gm=self.gm[key, i], gsd=self.gsd[key, i], 
+                           kappa=self.kappa[key, i], rho=self.rho[key, i], refr=self.refr[key, i])
+
+            return d
+
+        return DistributionEnsemble(self.n[key], self.gm[key], self.gsd[key], kappa=self.kappa[key], 
+                                    rho=self.rho[key], refr=self.refr[key], label=self.label)
+
+    def growth_factor(self, rh=0.):
+        """Return the hygroscopic growth factor of every mode of every distribution.
+
+        Parameters
+        ----------
+        rh: float or array of floats
+            The relative humidity as a percentage (0-100), either a single value 
+            or one per distribution. Default is 0.
+
+        Returns
+        -------
+        gf: np.ndarray
+            The ratio of wet to dry diameter with shape (n_distributions, n_modes).
+
+        """
+        rh = np.asarray(rh, dtype=float)
+
+        return k_kohler(diam_dry=1., kappa=self.kappa, rh=rh.reshape(rh.shape + (1, )*(2 - rh.ndim)))
+
+    def _params(self, rh=0., rho=None, ndim=0):
+        """Return the number, wet GM, GSD, and wet density of every mode with shape 
+        (n_distributions, n_modes) + (1, )*`ndim`; see AerosolDistribution._params."""
+        gm = self.gm * self.growth_factor(rh)
+
+        rho = np.full_like(self.gm, rho) if rho else self.rho
+
+        # calculate the effective density, taking into account hygroscopic growth
+        rho = rho_eff(np.stack(np.broadcast_arrays(rho, RHO_H20), axis=-1), 
+                      diams=np.stack([self.gm, gm - self.gm], axis=-1))
+
+        shape = self.n.shape + (1, )*ndim
+
+        return self.n.reshape(shape), gm.reshape(shape), self.gsd.reshape(shape), rho.reshape(shape)
+
+    def pdf(self, dp, base='log10', weight='number', rh=0., rho=None):
+        """Evaluate the probability distribution function of every distribution 
+        at particle diameter `dp`.
+
+        Parameters
+        ----------
+        dp : float or an array of floats
+            Particle diameter(s) to evaluate the pdf (um)
+        base : {None | 'none' | 'log' | 'log10'}
+            Base algorithm to use. Default is 'log10'
+        weight : {'number' | 'surface' | 'volume' | 'mass'}
+            Choose how to weight the pdf. Default is `number`.
+        rh: float or array of floats, optional
+            The relative humidity as a percentage (0-100), either a single value 
+            or one per distribution. Default is 0.
+        rho: float: optional
+            The particle density. If set, this will override the density set 
+            for individual modes.
+
+        Returns
+        -------
+        np.ndarray
+            The evaluated pdf with shape (n_distributions, ) + the shape of `dp`.
+
+        Examples
+        --------
+
+        >>> e = opcsim.DistributionEnsemble([1e3, 2e3], [0.1, 0.2], [1.5, 1.5])
+        >>> e.pdf(np.logspace(-2, 1, 100))
+
+        """
+        return self.pdf_evaluator(base=base, weight=weight, rh=rh, rho=rho)(dp)
+
+    def pdf_evaluator(self, base='log10', weight='number', rh=0., rho=None):
+        """Return a callable that evaluates the PDF of every distribution at any 
+        particle diameter(s); see :meth:`opcsim.AerosolDistribution.pdf_evaluator`.
+
+        Examples
+        --------
+
+        >>> e = opcsim.DistributionEnsemble([1e3, 2e3], [0.1, 0.2], [1.5, 1.5])
+        >>> f = e.pdf_evaluator(weight='volume')
+        >>> vals = f(np.logspace(-2, 1, 1000))
+
+        """
+        n, gm, gsd, rho = self._params(rh=rh, rho=rho)
+
+        return PDFEvaluator(n, gm, gsd, base=base, weight=weight, rho=rho)
+
+    def cdf(self, dmax, dmin=None, weight='number', rh=0., rho=None):
+        """Evaluate the cumulative distribution function of every distribution 
+        between `dmin` and `dmax`.
+
+        Parameters
+        ----------
+        dmax : float or array of floats
+            The maximum particle diameter in the integration (um)
+        dmin : float or array of floats
+            The minimum particle diameter in the integration (um)
+        weight : {'number' | 'surface' | 'volume' | 'mass'}
+            Choose how to weight the pdf. Default is `number`
+        rh: float or array of floats, optional
+            The relative humidity as a percentage (0-100), either a single value 
+            or one per distribution. Default is 0.
+        rho: float: optional
+            The particle density. If set, this will override the density set 
+            for individual modes.
+
+        Returns
+        -------
+        np.ndarray
+            The integrated distribution with shape (n_distributions, ) + the 
+            broadcast shape of `dmin` and `dmax`.
+
+        Examples
+        --------
+
+        Compute PM2.5 for every distribution at 50% RH
+
+        >>> e = opcsim.DistributionEnsemble([1e3, 2e3], [0.1, 0.2], [1.5, 1.5], kappa=0.53)
+        >>> pm25 = e.cdf(dmax=2.5, weight='mass', rh=50.)
+
+        """
+        if dmin is not None:
+            if np.any(np.asarray(dmin) >= np.asarray(dmax)):
+                raise ValueError("dmin must be less than dmax")
+
+        ndim = np.ndim(dmax) if dmin is None else np.broadcast(dmin, dmax).ndim
+
+        n, gm, gsd, rho = self._params(rh=rh, rho=rho, ndim=ndim)
+
+        return _get_cdf_func(n, gm, gsd, dmin, dmax, weight, rho).sum(axis=1)
+
+    def total(self, weight='number', rh=0., rho=None):
+        """Return the total number, surface area, volume, or mass of every 
+        distribution across all diameters.
+
+        Parameters
+        ----------
+        weight : {'number' | 'surface' | 'volume' | 'mass'}
+            Choose how to weight the pdf. Default is `number`
+        rh: float or array of floats, optional
+            The relative humidity as a percentage (0-100), either a single value 
+            or one per distribution. Default is 0.
+        rho: float: optional
+            The particle density. If set, this will override the density set 
+            for individual modes.
+
+        Returns
+        -------
+        np.ndarray
+            The total with shape (n_distributions, ).
+
+        Examples
+        --------
+
+        >>> e = opcsim.DistributionEnsemble([1e3, 2e3], [0.1, 0.2], [1.5, 1.5], rho=1.77)
+        >>> mass = e.total(weight='mass')
+
+        """
+        return self.cdf(dmax=np.inf, weight=weight, rh=rh, rho=rho)
+
+    def moments(self, dmin=None, dmax=10., rh=0., rho=None):
+        """Evaluate the total number, surface area, volume, and mass of particles 
+        between `dmin` and `dmax` for every distribution in a single pass; see 
+        :meth:`opcsim.AerosolDistribution.moments`.
+
+        Returns
+        -------
+        dict
+            The total `number`, `surface`, `volume`, and `mass` between dmin and 
+            dmax, each with shape (n_distributions, ) + the broadcast shape of 
+            `dmin` and `dmax`.
+
+        Examples
+        --------
+
+        >>> e = opcsim.DistributionEnsemble([1e3, 2e3], [0.1, 0.2], [1.5, 1.5], rho=1.77)
+        >>> pm = e.moments(dmax=[1., 2.5, 10.], rh=50.)["mass"]
+
+        """
+        if dmin is not None:
+            if np.any(np.asarray(dmin) >= np.asarray(dmax)):
+                raise ValueError("dmin must be less than dmax")
+
+        ndim = np.ndim(dmax) if dmin is None else np.broadcast(dmin, dmax).ndim
+
+        n, gm, gsd, rho = self._params(rh=rh, rho=rho, ndim=ndim)
+
+        number, surface, volume = _moments(n, gm, gsd, dmin, dmax)
+
+        return dict(number=number.sum(axis=1), surface=surface.sum(axis=1), 
+                    volume=volume.sum(axis=1), mass=(volume*rho).sum(axis=1))
+
+    def __repr__(self):
+        return "DistributionEnsemble: {} ({} distributions)".format(self.label, len(self))
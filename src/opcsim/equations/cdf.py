@@ -5,6 +5,13 @@ import math
 import numpy as np
 from scipy.special import erf, erfc
 
+def _below(func, n, gm, gsd, dmin):
+    """Integrate `func` up to `dmin`, counting nothing where dmin is not positive."""
+    dmin = np.asarray(dmin, dtype=float)
+    valid = dmin > 0.0
+
+    return np.where(valid, func(n, gm, gsd, dmin=None, dmax=np.where(valid, dmin, 1.)), 0.)
+
 def nt(n, gm, gsd, dmin=None, dmax=10.):
     """Evaluate the total number of particles between two diameters.
 
@@ -25,10 +32,11 @@ def nt(n, gm, gsd, dmin=None, dmax=10.):
         Median particle diameter (geometric mean) in units of microns.
     gsd : float
         Geometric Standard Deviation of the distribution.
-    dmin : float
+    dmin : float or array of floats
         The minimum particle diameter in microns. Default value is 0 :math:`\mu m`.
-    dmax : float
-        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`.
+    dmax : float or array of floats
+        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`. 
+        Array values of `dmin` and `dmax` are broadcast against each other.
 
     Returns
     -------
@@ -55,8 +63,8 @@ def nt(n, gm, gsd, dmin=None, dmax=10.):
     """
     res = (n/2.) * (1 + erf((np.log(dmax/gm)) / (np.sqrt(2) * np.log(gsd))))
 
-    if dmin is not None and dmin > 0.0:
-        res -= nt(n, gm, gsd, dmin=None, dmax=dmin)
+    if dmin is not None:
+        res = res - _below(nt, n, gm, gsd, dmin)
 
     return res
 
@@ -80,10 +88,11 @@ def st(n, gm, gsd, dmin=None, dmax=10.):
         Median particle diameter (geometric mean) in units of :math:`\mu m`.
     gsd : float
         Geometric Standard Deviation of the distribution.
-    dmin : float
+    dmin : float or array of floats
         The minimum particle diameter in microns. Default value is 0 :math:`\mu m`.
-    dmax : float
-        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`.
+    dmax : float or array of floats
+        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`. 
+        Array values of `dmin` and `dmax` are broadcast against each other.
 
     Returns
     -------
@@ -110,8 +119,8 @@ def st(n, gm, gsd, dmin=None, dmax=10.):
     res = (np.pi/2.)*n*(gm**2) * np.exp(2*(np.log(gsd)** 2)) * \
                 erfc((np.sqrt(2) * np.log(gsd)) - (np.log(dmax/gm) / (np.sqrt(2) * np.log(gsd))))
 
-    if dmin is not None and dmin > 0.0:
-        res -= st(n, gm, gsd, dmin=None, dmax=dmin)
+    if dmin is not None:
+        res = res - _below(st, n, gm, gsd, dmin)
 
     return res
 
@@ -135,10 +144,11 @@ def vt(n, gm, gsd, dmin=None, dmax=10.):
         Median particle diameter (geometric mean) in units of :math:`\mu m`.
     gsd : float
         Geometric Standard Deviation of the distribution.
-    dmin : float
+    dmin : float or array of floats
         The minimum particle diameter in microns. Default value is 0 :math:`\mu m`.
-    dmax : float
-        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`.
+    dmax : float or array of floats
+        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`. 
+        Array values of `dmin` and `dmax` are broadcast against each other.
 
     Returns
     -------
@@ -166,7 +176,75 @@ def vt(n, gm, gsd, dmin=None, dmax=10.):
     res = (np.pi/12.)*n*(gm**3) * np.exp(9./2.*(np.log(gsd)**2)) * \
                 erfc((1.5*np.sqrt(2) * np.log(gsd)) - (np.log(dmax/gm) / (np.sqrt(2) * np.log(gsd))))
 
-    if dmin is not None and dmin > 0.0:
-        res -= vt(n, gm, gsd, dmin=None, dmax=dmin)
+    if dmin is not None:
+        res = res - _below(vt, n, gm, gsd, dmin)
+
+    return res
+
+def moments(n, gm, gsd, dmin=None, dmax=10.):
+    """Evaluate the total number, surface area, and volume of particles between 
+    two diameters in a single pass.
+
+    This is equivalent to calling :func:`nt`, :func:`st`, and :func:`vt`, but the 
+    logarithm of each diameter is only computed once and all three moments are 
+    computed from a single call to `erfc` per side of the range.
+
+    Parameters
+    ----------
+    n : float or array of floats
+        Total aerosol number concentration in units of #/cc
+    gm : float or array of floats
+        Median particle diameter (geometric mean) in units of microns.
+    gsd : float or array of floats
+        Geometric Standard Deviation of the distribution.
+    dmin : float or array of floats
+        The minimum particle diameter in microns. Default value is 0 :math:`\mu m`.
+    dmax : float or array of floats
+        The maximum particle diameter in microns. Default value is 10 :math:`\mu m`.
+
+    Returns
+    -------
+    N, S, V | np.ndarray
+        An array with shape (3, ...) containing the total number [:math:`cm^{-3}`], 
+        surface area [:math:`\mu m^2 cm^{-3}`], and volume [:math:`\mu m^3 cm^{-3}`] 
+        between dmin and dmax, where the remaining axes are the broadcast shape of 
+        all of the inputs.
+
+    See Also
+    --------
+    opcsim.equations.cdf.nt
+    opcsim.equations.cdf.st
+    opcsim.equations.cdf.vt
+
+    Examples
+    --------
+
+    Evaluate the number, surface area, and volume of a mode under 1, 2.5, and 
+    10 :math:`\mu m`:
+
+    >>> n, s, v = opcsim.equations.cdf.moments(1e3, 0.1, 1.5, dmax=[1., 2.5, 10.])
+
+    """
+    s = np.log(gsd)
+
+    def upper(d):
+        # the three moments of every particle smaller than d (none if d <= 0)
+        d = np.asarray(d, dtype=float)
+
+        with np.errstate(divide="ignore"):
+            u = np.log(np.where(d > 0, d, 0.) / gm) / (np.sqrt(2) * s)
+
+        shift = np.array([0., 1., 1.5]).reshape((3, ) + (1, )*np.ndim(u)) * np.sqrt(2) * s
+        parts = erfc(shift - u)
+
+        return np.stack(np.broadcast_arrays(
+            (n/2.) * parts[0], 
+            (np.pi/2.)*n*(gm**2) * np.exp(2*(s**2)) * parts[1], 
+            (np.pi/12.)*n*(gm**3) * np.exp(9./2.*(s**2)) * parts[2]))
+
+    res = upper(dmax)
+
+    if dmin is not None:
+        res = res - upper(dmin)
 
     return res
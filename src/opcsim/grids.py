@@ -0,0 +1,239 @@
+"""Contains the diameter grids used to discretize a distribution before it is
+evaluated by a model.
+"""
+
+import numpy as np
+from scipy.special import erfinv
+
+from .utils import k_kohler
+
+
+class LogGrid(object):
+    """A fixed, log-spaced grid of diameters that is shared by every mode.
+
+    Since the grid does not depend on the distribution, every distribution
+    evaluated on it can reuse the same Mie calculations.
+    """
+    per_mode = False
+    reusable = True
+
+    def __init__(self, dmin=0.25, dmax=10., n_bins=250):
+        """
+
+        Parameters
+        ----------
+        dmin: float
+            The smallest boundary of the grid in microns. Default is 0.25.
+        dmax: float
+            The largest boundary of the grid in microns. Default is 10.
+        n_bins: int
+            The number of boundaries in the grid. Default is 250.
+
+        Returns
+        -------
+        LogGrid
+            An instance of the opcsim.LogGrid class
+
+        Examples
+        --------
+
+        Build a grid of 250 boundaries between 0.1 and 10 microns
+
+        >>> grid = opcsim.LogGrid(dmin=0.1, dmax=10., n_bins=250)
+        >>> bounds = grid.boundaries()
+
+        """
+        if not dmin < dmax:
+            raise ValueError("dmin must be less than dmax")
+
+        self.dmin = dmin
+        self.dmax = dmax
+        self.n_bins = int(n_bins)
+
+    def boundaries(self, mode=None, rh=0.):
+        """Return the boundaries of the grid in microns.
+
+        Parameters
+        ----------
+        mode: dict, optional
+            The mode being discretized; unused.
+        rh: float, optional
+            The relative humidity in % (0-100); unused.
+
+        Returns
+        -------
+        bounds: np.ndarray
+            The boundaries of the grid.
+
+        """
+        return np.logspace(np.log10(self.dmin), np.log10(self.dmax), self.n_bins)
+
+    def __repr__(self): # pragma: no cover
+        return "LogGrid: {} - {} um ({} boundaries)".format(self.dmin, self.dmax, self.n_bins)
+
+
+class QuantileGrid(object):
+    """A grid with the same number of particles in every bin of a (wet) mode.
+
+    The boundaries are placed at evenly spaced quantiles of each lognormal
+    mode, so the resolution follows the particles rather than a fixed range.
+    The fraction `tail` of particles on either end of the mode is left out.
+
+    Since the boundaries are unique to every mode, the response matrices built 
+    on them are not cached.
+    """
+    per_mode = True
+    reusable = False
+
+    def __init__(self, n_bins=100, tail=1e-4):
+        """
+
+        Parameters
+        ----------
+        n_bins: int
+            The number of boundaries per mode. Default is 100.
+        tail: float
+            The fraction of particles on either side of the mode that are left
+            off the grid. Default is 1e-4.
+
+        Returns
+        -------
+        QuantileGrid
+            An instance of the opcsim.QuantileGrid class
+
+        Examples
+        --------
+
+        Build a quantile grid and compute the boundaries of a single mode at
+        50% RH
+
+        >>> grid = opcsim.QuantileGrid(n_bins=100)
+        >>> d = opcsim.load_distribution("urban")
+        >>> bounds = grid.boundaries(mode=d.modes[0], rh=50.)
+
+        """
+        if not 0 < tail < 0.5:
+            raise ValueError("tail must be between 0 and 0.5")
+
+        self.n_bins = int(n_bins)
+        self.tail = tail
+
+    def boundaries(self, mode=None, rh=0.):
+        """Return the boundaries of the grid for a mode in microns.
+
+        Parameters
+        ----------
+        mode: dict
+            The mode being discretized (an entry of `AerosolDistribution.modes`).
+        rh: float, optional
+            The relative humidity in % (0-100). Default is 0.
+
+        Returns
+        -------
+        bounds: np.ndarray
+            The boundaries of the grid.
+
+        """
+        if mode is None:
+            raise ValueError("A QuantileGrid needs a mode to compute its boundaries.")
+
+        gm = k_kohler(diam_dry=mode["GM"], kappa=mode["kappa"], rh=rh)
+        q = np.linspace(self.tail, 1. - self.tail, self.n_bins)
+
+        return gm * np.exp(np.sqrt(2) * np.log(mode["GSD"]) * erfinv(2*q - 1))
+
+    def __repr__(self): # pragma: no cover
+        return "QuantileGrid: {} boundaries per mode".format(self.n_bins)
+
+
+class AdaptiveGrid(object):
+    """A grid that only covers the span of each (wet) mode, with boundaries
+    snapped to a fixed log lattice.
+
+    The boundaries are always of the form :math:`10^{k/n}` for integer `k`,
+    where `n` is the number of boundaries per decade, so any two distributions
+    share the diameters they have in common and their Mie calculations can be
+    cached.
+    """
+    per_mode = True
+    reusable = True
+
+    def __init__(self, n_per_decade=128, width=4., dmin=None, dmax=None):
+        """
+
+        Parameters
+        ----------
+        n_per_decade: int
+            The number of boundaries per decade of diameter. Default is 128.
+        width: float
+            The half-width of each mode, in multiples of log(GSD). Default is 4.
+        dmin: float, optional
+            If set, the grid never extends below this diameter (microns).
+        dmax: float, optional
+            If set, the grid never extends above this diameter (microns).
+
+        Returns
+        -------
+        AdaptiveGrid
+            An instance of the opcsim.AdaptiveGrid class
+
+        Examples
+        --------
+
+        Build an adaptive grid with 64 boundaries per decade that stops at 10 microns
+
+        >>> grid = opcsim.AdaptiveGrid(n_per_decade=64, dmax=10.)
+        >>> d = opcsim.load_distribution("urban")
+        >>> bounds = grid.boundaries(mode=d.modes[0], rh=0.)
+
+        """
+        self.n_per_decade = int(n_per_decade)
+        self.width = width
+        self.dmin = dmin
+        self.dmax = dmax
+
+    def boundaries(self, mode=None, rh=0.):
+        """Return the boundaries of the grid for a mode in microns.
+
+        Parameters
+        ----------
+        mode: dict
+            The mode being discretized (an entry of `AerosolDistribution.modes`).
+        rh: float, optional
+            The relative humidity in % (0-100). Default is 0.
+
+        Returns
+        -------
+        bounds: np.ndarray
+            The boundaries of the grid.
+
+        """
+        if mode is None:
+            raise ValueError("An AdaptiveGrid needs a mode to compute its boundaries.")
+
+        gm = k_kohler(diam_dry=mode["GM"], kappa=mode["kappa"], rh=rh)
+
+        lo = np.log10(gm) - self.width*np.log10(mode["GSD"])
+        hi = np.log10(gm) + self.width*np.log10(mode["GSD"])
+
+        if self.dmin is not None:
+            lo = max(lo, np.log10(self.dmin))
+
+        if self.dmax is not None:
+            hi = min(hi, np.log10(self.dmax))
+
+        # snap the span outwards onto the lattice (keeping at least one bin)
+        k0 = int(np.floor(lo * self.n_per_decade))
+        k1 = max(int(np.ceil(hi * self.n_per_decade)), k0 + 1)
+
+        return 10**(np.arange(k0, k1 + 1) / self.n_per_decade)
+
+    def __repr__(self): # pragma: no cover
+        return "AdaptiveGrid: {} boundaries per decade".format(self.n_per_decade)
+
+
+__all__ = [
+    'LogGrid',
+    'QuantileGrid',
+    'AdaptiveGrid'
+]
@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 from .models import OPC
 from .utils import k_kohler, ri_eff
-from .mie import cscat
+from .mie import cscat_many
 
 
 def compute_bin_assessment(opc, refr, kappa, rh_values=[0., 35., 95.]):
@@ -35,32 +35,33 @@ def compute_bin_assessment(opc, refr, kappa, rh_values=[0., 35., 95.]):
     # init the dataframe to hold our results
     rv = list()
 
-    for rh in rh_values:
-        for i, _bins in enumerate(opc.bins):
-            # compute the wet diameter
-            wet_diam_lo = k_kohler(diam_dry=_bins[0], kappa=kappa, rh=rh)
-            wet_diam_hi = k_kohler(diam_dry=_bins[-1], kappa=kappa, rh=rh)
+    # compute the expected (dry) scattering cross-sections at every bin boundary
+    cscat_lo_exp = cscat_many(
+        opc.bins[:, 0], wl=opc.wl, refr=refr, theta1=opc.theta[0], theta2=opc.theta[1])
+    cscat_hi_exp = cscat_many(
+        opc.bins[:, -1], wl=opc.wl, refr=refr, theta1=opc.theta[0], theta2=opc.theta[1])
 
-            # compute the pct_dry
-            pct_dry = (_bins[0]**3) / (wet_diam_lo**3)
+    for rh in rh_values:
+        # compute the wet diameter
+        wet_diam_lo = k_kohler(diam_dry=opc.bins[:, 0], kappa=kappa, rh=rh)
+        wet_diam_hi = k_kohler(diam_dry=opc.bins[:, -1], kappa=kappa, rh=rh)
 
-            # compute the effective RI
-            ri = ri_eff(species=[refr, complex(1.333, 0)], weights=[pct_dry, 1-pct_dry])
+        # compute the pct_dry (the same for every bin)
+        pct_dry = 1. / (k_kohler(diam_dry=1., kappa=kappa, rh=rh)**3)
 
-            # compute the scattering cross-section
-            cscat_lo_exp = cscat(
-                dp=_bins[0], wl=opc.wl, refr=refr, theta1=opc.theta[0], theta2=opc.theta[1])
-            cscat_hi_exp = cscat(
-                dp=_bins[-1], wl=opc.wl, refr=refr, theta1=opc.theta[0], theta2=opc.theta[1])
+        # compute the effective RI
+        ri = ri_eff(species=[refr, complex(1.333, 0)], weights=[pct_dry, 1-pct_dry])
 
-            cscat_lo = cscat(
-                dp=wet_diam_lo, wl=opc.wl, refr=ri, theta1=opc.theta[0], theta2=opc.theta[1])
-            cscat_hi = cscat(
-                dp=wet_diam_hi, wl=opc.wl, refr=ri, theta1=opc.theta[0], theta2=opc.theta[1])
+        # compute the scattering cross-section for every bin at once
+        cscat_lo = cscat_many(
+            wet_diam_lo, wl=opc.wl, refr=ri, theta1=opc.theta[0], theta2=opc.theta[1])
+        cscat_hi = cscat_many(
+            wet_diam_hi, wl=opc.wl, refr=ri, theta1=opc.theta[0], theta2=opc.theta[1])
 
+        for i, _bins in enumerate(opc.bins):
             # assign bins
-            bin_assign_lo = opc.calibration_function(values=[cscat_lo])
-            bin_assign_hi = opc.calibration_function(values=[cscat_hi])
+            bin_assign_lo = opc.calibration_function(values=[cscat_lo[i]])
+            bin_assign_hi = opc.calibration_function(values=[cscat_hi[i]])
 
             # add results to the dataframe
             rv.append({
@@ -69,8 +70,8 @@ def compute_bin_assessment(opc, refr, kappa, rh_values=[0., 35., 95.]):
                 "bin_hi": bin_assign_hi[0] if len(bin_assign_hi) > 0 else -99,
                 "refr_eff": ri,
                 "rh": rh,
-                "cscat_hi_ratio": cscat_hi / cscat_hi_exp,
-                "cscat_lo_ratio": cscat_lo / cscat_lo_exp,
+                "cscat_hi_ratio": cscat_hi[i] / cscat_hi_exp[i],
+                "cscat_lo_ratio": cscat_lo[i] / cscat_lo_exp[i],
             })
             
     rv = pd.DataFrame(rv)
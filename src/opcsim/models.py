@@ -2,12 +2,20 @@ import numpy as np
 import pandas as pd
 import math
 import scipy
+import scipy.optimize
+from scipy.special import ndtr
 
-from .distributions import AerosolDistribution
+from .distributions import AerosolDistribution, DistributionEnsemble
+from .equations.cdf import nt
+from . import grids
+from .grids import LogGrid
 from .utils import make_bins, midpoints, squash_dips, power_law_fit, \
     ri_eff, rho_eff, k_kohler
-from .mie import cscat
+from .mie import cscat_many, CscatCache, CscatTable
 import functools
+import collections
+import json
+import io
 
 RI_COMMON = {
     "psl": complex(1.59, 0),
@@ -23,10 +31,72 @@ RI_COMMON = {
 }
 
 
+def _check_cscat_table(table, wl, theta):
+    """Make sure a Cscat lookup table was built for the same wavelength and viewing angle."""
+    if table is None:
+        return None
+
+    if not np.isclose(table.wl, wl) or not np.allclose(table.theta, theta):
+        raise ValueError("The Cscat table was built for a different wavelength or viewing angle.")
+
+    return table
+
+
+def _ri_wet(refr, pct_dry):
+    """Return the volume-weighted refractive index of particles that are `pct_dry` 
+    dry material and water otherwise (see :func:`opcsim.utils.ri_eff`); broadcasts 
+    over arrays of both."""
+    refr, pct_dry = np.broadcast_arrays(np.asarray(refr, dtype=complex), pct_dry)
+
+    return np.asarray(ri_eff(np.stack([refr, np.full_like(refr, RI_COMMON['h2o'])], axis=-1), 
+                             weights=np.stack([pct_dry, 1 - pct_dry], axis=-1)))
+
+
+def _settings_to_json(obj, **extra):
+    """Serialize the settings shared by every model (cache, lookup table, and
+    large-particle threshold) along with any `extra` fields."""
+    cache = None if obj.cache is None else dict(maxsize=obj.cache.maxsize, rtol=obj.cache.rtol)
+
+    return dict(wl=obj.wl, theta=list(obj.theta), approx_threshold=obj.approx_threshold, 
+                cache=cache, **extra)
+
+
+def _table_to_bytes(table):
+    """Return a CscatTable as an array of bytes (in its own .npz format)."""
+    buf = io.BytesIO()
+    table.save(buf)
+
+    return np.frombuffer(buf.getvalue(), dtype=np.uint8)
+
+
+def _table_from_bytes(data):
+    """Load a CscatTable from an array of bytes written by `_table_to_bytes`."""
+    return CscatTable.load(io.BytesIO(data.tobytes()))
+
+
+def _load_common(data, VERSION, name):
+    """Check the version of a saved model and return its settings and kwargs."""
+    if int(data["version"]) != VERSION:
+        raise ValueError("Unsupported {} version: {}".format(name, int(data["version"])))
+
+    settings = json.loads(str(data["settings"]))
+
+    kwargs = dict(
+        approx_threshold=settings["approx_threshold"],
+        cache=None if settings["cache"] is None else CscatCache(**settings["cache"]))
+
+    if "cscat_table" in data:
+        kwargs["cscat_table"] = _table_from_bytes(data["cscat_table"])
+
+    return settings, kwargs
+
+
 class OPC(object):
     """Define an Optical Particle Counter (OPC) with unique properties 
     for wavelength, bins, and viewing angle.
     """
+    VERSION = 1
+
     def __init__(self, wl, bins=None, n_bins=5, dmin=0.5, 
             dmax=2.5, theta=(30., 90.), **kwargs):
         """
@@ -46,6 +116,24 @@ class OPC(object):
             The right-most bin boundary of the OPC.
         theta: tuple of floats
             The viewing range in units of degrees.
+        cscat_table: opcsim.mie.CscatTable, optional
+            A precomputed lookup table of Cscat values for this wavelength and viewing 
+            angle. If set, it is used in place of Mie theory.
+        cache: opcsim.mie.CscatCache or None, optional
+            A memoization cache for Cscat values. By default, every instance gets its 
+            own cache; set to None to disable caching.
+        approx_threshold: float or None, optional
+            If set, particles with a size parameter above this value are computed 
+            with a large-particle approximation instead of Mie theory. See 
+            :func:`opcsim.mie.cscat_many` for its error bounds and the viewing 
+            angles it is used for. Default is None.
+        grid: opcsim.LogGrid, opcsim.QuantileGrid, or opcsim.AdaptiveGrid, optional
+            The diameter grid used to discretize distributions in 
+            :meth:`opcsim.OPC.evaluate`. Default is a LogGrid with 250 boundaries 
+            between dmin/2 and 10 microns.
+        max_response_matrices: int, optional
+            The maximum number of response matrices (see :meth:`opcsim.OPC.response_matrix`) 
+            kept in memory; the least recently used are dropped first. Default is 32.
         
         Returns
         -------
@@ -63,6 +151,14 @@ class OPC(object):
         
         >>> opc = opcsim.OPC(wl=0.658, bins=[0.38, 0.54, 0.78, 1.05, 1.5, 2.5], theta=(32., 88.))
 
+        Use the large-particle approximation for coarse particles (x > 100)
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=5, dmin=0.5, dmax=2.5, approx_threshold=100.)
+
+        Discretize distributions on an adaptive grid with 64 boundaries per decade
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=5, grid=opcsim.AdaptiveGrid(n_per_decade=64, dmax=10.))
+
         """
         # set some params
         self.n_bins = n_bins
@@ -72,10 +168,16 @@ class OPC(object):
         self.wl = wl
         self.theta = theta
         self.label = kwargs.pop("label", None)
+        self.cscat_table = _check_cscat_table(kwargs.pop("cscat_table", None), wl, theta)
+        self.cache = kwargs.pop("cache", CscatCache())
+        self.approx_threshold = kwargs.pop("approx_threshold", None)
         self.calibration_function = None
         self.calibration_refr = None
         self.calibration_vals = None
         self._cscat_boundaries = None
+        self.max_response_matrices = kwargs.pop("max_response_matrices", 32)
+        self._response_matrices = collections.OrderedDict()
+        self._response_matrix_settings = None
 
         # generate the bins
         if self.bins is None:
@@ -93,6 +195,12 @@ class OPC(object):
         
         self.bin_boundaries = np.append(self.bins[:, 0], self.bins[-1, -1])
 
+        # the grid used to discretize distributions before they are evaluated
+        self.grid = kwargs.pop("grid", None)
+
+        if self.grid is None:
+            self.grid = LogGrid(dmin=self.dmin / 2, dmax=10., n_bins=250)
+
         return
 
     @property
@@ -177,8 +285,7 @@ class OPC(object):
                 refr = material
         
         # calculate Cscat at all bin boundaries
-        yvals = np.array([cscat(dp=dp, wl=self.wl, refr=refr, theta1=self.theta[0],
-                                theta2=self.theta[1], **mie_kws) for dp in self.bin_boundaries])
+        yvals = self._cscat(self.bin_boundaries, refr=refr, **mie_kws)
         
         # generate the fitted Cscat values based on the method chosen
         if method == "spline":
@@ -225,29 +332,49 @@ class OPC(object):
         # save the fitted boundaries for potential future use
         self._cscat_boundaries = yvals
 
+        # any response matrices built against the old calibration are now stale
+        self._response_matrices.clear()
+
     def evaluate(self, distribution, rh=0., **kwargs):
         """Return the total number of particles in each bin for a given AerosolDistribution.
 
         We evaluate an OPC for a given distribution by calculating the Cscat value
         for every particle in the distribution and assigning it to a bin of the OPC.
         Since we are beginning with a PDF and not a distribution, we must first 
-        discretize our PDF - we can choose the number of bins to convert of PDF 
-        into which allows us to limit the computation needed by only performing 
-        calculations for a small subset of the actual particles (i.e. we can do one
-        calculation for a tiny bin and then replicate it without needing to re-do the 
-        Mie calculations).
+        discretize our PDF onto a grid of diameters (see `grid`), which allows us to 
+        limit the computation needed by only performing calculations for a small 
+        subset of the actual particles (i.e. we can do one calculation for a tiny 
+        bin and then replicate it without needing to re-do the Mie calculations).
+
+        The mapping from the discretized PDF onto the OPC bins is a response matrix 
+        (see :meth:`opcsim.OPC.response_matrix`) that is cached on the OPC, so 
+        repeated evaluations only integrate the distribution and do one matrix-vector 
+        product per mode.
 
         Parameters
         ----------
-        distribution: AerosolDistribution
-            A valid instance of the AerosolDistribution class.
-        rh: float
-            The relative humidity in % (0-100)
+        distribution: AerosolDistribution or DistributionEnsemble
+            A valid instance of the AerosolDistribution class, or an ensemble of 
+            distributions that are evaluated in a single batch (see 
+            :meth:`opcsim.OPC.evaluate_many`).
+        rh: float or array of floats
+            The relative humidity in % (0-100). If an array, the distribution is 
+            evaluated at every RH in a single batch (see :meth:`opcsim.OPC.evaluate_many`). 
+            For an ensemble, either a single value or one per distribution.
+        grid: opcsim.LogGrid, opcsim.QuantileGrid, or opcsim.AdaptiveGrid, optional
+            The diameter grid used to discretize the distribution. Default is the 
+            grid set on the OPC.
+        bounds: tuple of floats, optional
+            Shorthand for ``grid=opcsim.LogGrid(bounds[0], bounds[1], n_bins)``.
+        n_bins: int, optional
+            The number of boundaries used with `bounds`. Default is 250.
 
         Returns
         -------
         dN: array
-            The number of particles in each OPC bin (size is the number of bins)
+            The number of particles in each OPC bin (size is the number of bins). If 
+            `rh` is an array, the result has shape (len(rh), n_bins); for an ensemble, 
+            the result has shape (n_distributions, n_bins).
 
         Examples
         --------
@@ -268,48 +395,459 @@ class OPC(object):
         >>> vals_50 = opc.evaluate(d, rh=50.)
         >>> als_100 = opc.evaluate(d, rh=100.)
 
+        Or, evaluate them all at once
+
+        >>> vals = opc.evaluate(d, rh=np.linspace(0., 95., 20))
+
+        Evaluate an ensemble of distributions at once
+
+        >>> e = opcsim.DistributionEnsemble(n=np.full(1000, 1e3), gm=np.linspace(0.1, 0.5, 1000), 
+        ...                                 gsd=np.full(1000, 1.5), kappa=0.53, refr=complex(1.521, 0))
+        >>> vals = opc.evaluate(e, rh=50.)
+
+        Evaluate a distribution on a grid that follows each mode
+
+        >>> vals = opc.evaluate(d, rh=0., grid=opcsim.QuantileGrid(n_bins=200))
+
         """
         if not self.calibration_function:
             raise Exception("The OPC must be calibrated before computing a histogram.")
 
-        # create the bins for the distribution PDF
-        bounds = kwargs.pop("bounds", (self.dmin / 2, 10.))
+        grid = self._grid(**kwargs)
 
-        # calculate the total number of particles in the distribution
-        ntot = distribution.cdf(dmin=0, dmax=100., weight='number')
+        if isinstance(distribution, DistributionEnsemble):
+            return self.evaluate_many(distribution.n, distribution.gm, distribution.gsd, rh=rh, 
+                                      kappa=distribution.kappa, refr=distribution.refr, grid=grid)
 
-        bounds = np.logspace(start=np.log10(bounds[0]), stop=np.log10(
-            bounds[1]), num=kwargs.pop("n_bins", int(min(ntot/3, 250))))
+        # evaluate every RH at once as a batch of identical distributions
+        if np.ndim(rh) > 0:
+            rh = np.asarray(rh, dtype=float)
+            modes = distribution.modes
 
-        # we need to calculate the midpoint of the new bounds to compute the cscats!
-        diams = np.mean([bounds[:-1], bounds[1:]], axis=0)
+            # grids that follow the modes change with RH, so each RH is done on its own
+            if grid.per_mode:
+                return np.array([self.evaluate(distribution, rh=each, grid=grid) for each in rh])
+
+            return self.evaluate_many(
+                n=np.tile([m["N"] for m in modes], (rh.shape[0], 1)), 
+                gm=np.tile([m["GM"] for m in modes], (rh.shape[0], 1)), 
+                gsd=np.tile([m["GSD"] for m in modes], (rh.shape[0], 1)), rh=rh, 
+                kappa=[m["kappa"] for m in modes], refr=[m["refr"] for m in modes], 
+                grid=grid)
 
         # for each mode...
         rv = np.zeros(self.n_bins)
 
         for m in distribution.modes:
-            # divide our PDF into bins to make the computations a bit easier
-            n = np.array([distribution.cdf(dmin=a, dmax=b, mode=m["label"], rh=rh)
-                                for a, b in zip(bounds[0:-1], bounds[1:])])
-            
-            # calculate the % dry based on hygroscopic growth
-            pct_dry = 1. / (k_kohler(diam_dry=1., kappa=m["kappa"], rh=rh)**3)
+            bounds = grid.boundaries(mode=m, rh=rh)
 
-            refr = ri_eff([m["refr"], RI_COMMON['h2o']], weights=[pct_dry, 1-pct_dry])
-
-            # iterate over each bin and calculate the Cscat value and build an array
-            for dp, dn in zip(diams, n):
-                # ammend the RI based on the RH
-                v = cscat(
-                    dp, wl=self.wl, refr=refr, theta1=self.theta[0], theta2=self.theta[1])
-                
-                bin_assign = self.calibration_function(values=[v])
+            # divide our PDF into bins to make the computations a bit easier
+            n = np.diff(distribution.cdf(dmax=bounds, mode=m["label"], rh=rh))
 
-                if len(bin_assign) > 0:
-                    rv[bin_assign] += dn
+            # map the particles in each bin onto the OPC bins
+            rv += n @ self.response_matrix(refr=m["refr"], kappa=m["kappa"], rh=rh, grid=bounds, 
+                                           cache=grid.reusable)
         
         return rv
     
+    def evaluate_many(self, n, gm=None, gsd=None, rh=0., kappa=0., refr=complex(1.5, 0), **kwargs):
+        """Return the total number of particles in each bin for a time series of 
+        lognormal distributions.
+
+        This is the batched version of :meth:`opcsim.OPC.evaluate`. Every row is a 
+        distribution made up of one or more lognormal modes. All rows are discretized 
+        onto the same diameter grid at once, and the Cscat values for every unique 
+        effective refractive index (i.e. every unique combination of material, kappa, 
+        and RH) are computed in a single call. If the RH changes on (nearly) every 
+        row, Cscat is instead interpolated from a fixed lattice of wet refractive 
+        indices (see `n_lattice`), so neither the Mie work nor the number of 
+        Python-level operations grows with the number of rows.
+
+        Parameters
+        ----------
+        n: array of floats or pd.DataFrame
+            The total number concentration of each mode with shape (n_times, n_modes). 
+            A 1-D array is treated as a single mode. Alternatively, a DataFrame with 
+            columns `N_i`, `GM_i`, and `GSD_i` for every mode `i` and, optionally, 
+            an `rh` column.
+        gm: array of floats
+            The geometric mean diameter of each mode in microns with shape 
+            (n_times, n_modes). Ignored if `n` is a DataFrame.
+        gsd: array of floats
+            The geometric standard deviation of each mode with shape 
+            (n_times, n_modes). Ignored if `n` is a DataFrame.
+        rh: float or array of floats
+            The relative humidity in % (0-100), either a single value or one 
+            per row. Default is 0.
+        kappa: float or array of floats
+            The k-kohler coefficient, either a single value, one per mode, or one 
+            per row and mode. Default is 0.
+        refr: complex or array of complex
+            The complex refractive index, either a single value, one per mode, or 
+            one per row and mode. Default is 1.5+0j.
+        grid: opcsim.LogGrid, optional
+            The diameter grid shared by every distribution. Grids that depend on the 
+            distribution (e.g. QuantileGrid) are not supported. Default is the grid 
+            set on the OPC.
+        bounds: tuple of floats, optional
+            Shorthand for ``grid=opcsim.LogGrid(bounds[0], bounds[1], n_bins)``.
+        n_bins: int, optional
+            The number of boundaries used with `bounds`. Default is 250.
+        chunksize: int, optional
+            The number of rows discretized at a time, which bounds the memory used by 
+            the (rows, modes, grid) intermediates. Default is 1024.
+        n_lattice: int, optional
+            When the rows have more unique wet refractive indices than this (per 
+            material), e.g. when the RH changes on every row, Cscat is computed on a 
+            lattice of `n_lattice` evenly spaced dry volume fractions between 0 and 1 
+            and linearly interpolated, so the Mie work does not grow with the number 
+            of rows. Default is 201.
+
+        Returns
+        -------
+        dN: np.ndarray
+            The number of particles in each OPC bin with shape (n_times, n_bins)
+
+        Examples
+        --------
+
+        Evaluate an OPC for a time series of single-mode distributions of 
+        ammonium sulfate
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+        >>> opc.calibrate(material="psl")
+        >>> n = np.full(1000, 1e3)
+        >>> gm = np.linspace(0.1, 0.5, 1000)
+        >>> gsd = np.full(1000, 1.5)
+        >>> rh = np.linspace(0., 90., 1000)
+        >>> vals = opc.evaluate_many(n, gm, gsd, rh=rh, kappa=0.53, refr=complex(1.521, 0))
+
+        Evaluate an OPC for a DataFrame of bi-modal fits
+
+        >>> df = pd.DataFrame({"N_1": [1e3, 2e3], "GM_1": [0.1, 0.12], "GSD_1": [1.5, 1.5], 
+        ...                    "N_2": [10., 12.], "GM_2": [1., 1.1], "GSD_2": [1.8, 1.8], 
+        ...                    "rh": [30., 60.]})
+        >>> vals = opc.evaluate_many(df, refr=complex(1.521, 0))
+
+        """
+        if not self.calibration_function:
+            raise Exception("The OPC must be calibrated before computing a histogram.")
+
+        chunksize = kwargs.pop("chunksize", 1024)
+        n_lattice = kwargs.pop("n_lattice", 201)
+
+        if isinstance(n, pd.DataFrame):
+            if "rh" in n.columns:
+                rh = n["rh"].values
+
+            e = DistributionEnsemble.from_dataframe(n, kappa=kappa, refr=refr)
+        else:
+            e = DistributionEnsemble(n, gm, gsd, kappa=kappa, refr=refr)
+
+        n, gm, gsd, kappa, refr = e.n, e.gm, e.gsd, e.kappa, e.refr
+
+        n_times, n_modes = n.shape
+
+        rh = np.broadcast_to(np.asarray(rh, dtype=float), (n_times, ))
+
+        if n_modes == 0:
+            return np.zeros((n_times, self.n_bins))
+
+        # create the diameter grid shared by every distribution
+        grid = self._grid(**kwargs)
+
+        if grid.per_mode:
+            raise ValueError("evaluate_many needs a grid that is shared by every distribution.")
+
+        grid = grid.boundaries()
+
+        # calculate the growth factor and % dry of every mode at every RH
+        gf = e.growth_factor(rh)
+        pct_dry = 1. / gf**3
+
+        # the Cscat values of every wet mode at the midpoint of every grid bin
+        v, lower, frac = self._wet_cscat(np.mean([grid[:-1], grid[1:]], axis=0), refr, 
+                                         pct_dry, n_lattice)
+
+        if frac is None:
+            bin_assign = self._assign_bins(v)
+
+        rv = np.zeros((n_times, self.n_bins))
+
+        for i in range(0, n_times, chunksize):
+            s = slice(i, i+chunksize)
+            n_rows = rv[s].shape[0]
+
+            # divide every wet mode into the grid
+            counts = np.diff(nt(n[s, :, None], gm[s, :, None]*gf[s, :, None], gsd[s, :, None], 
+                                dmax=grid), axis=-1).reshape(n_rows*n_modes, -1)
+
+            # look up (or interpolate) the OPC bin of every grid point
+            if frac is None:
+                assign = bin_assign[lower[s].reshape(-1)]
+            else:
+                k, f = lower[s], frac[s][..., None]
+                assign = self._assign_bins((1 - f)*v[k] + f*v[k + 1]).reshape(n_rows*n_modes, -1)
+
+            # accumulate the counts into the OPC bins of each row
+            rows = np.repeat(np.arange(n_rows), n_modes)[:, None]
+            valid = assign >= 0
+
+            rv[s] = np.bincount((rows*self.n_bins + assign)[valid], weights=counts[valid], 
+                                minlength=n_rows*self.n_bins).reshape(n_rows, self.n_bins)
+
+        return rv
+
+    def response_matrix(self, refr, kappa=0., rh=0., grid=None, cache=True):
+        """Return the matrix that maps the number of particles in each bin of a 
+        diameter grid onto the bins of the OPC.
+
+        Each row of the matrix corresponds to a bin of the (wet) diameter grid and 
+        contains a one in the column of the OPC bin its midpoint is assigned to, or 
+        zeros if it falls outside of the OPC. For a fixed material, kappa, RH, and 
+        grid, the matrix does not depend on the distribution, so it is computed 
+        once and cached on the instance until the OPC is re-calibrated (or its 
+        wavelength, viewing angle, `approx_threshold`, or `cscat_table` is changed). 
+        At most `max_response_matrices` are kept, dropping the least recently used.
+
+        Parameters
+        ----------
+        refr: complex
+            The complex refractive index of the dry material.
+        kappa: float
+            The k-kohler coefficient of the material. Default is 0.
+        rh: float
+            The relative humidity in % (0-100). Default is 0.
+        grid: array of floats, optional
+            The boundaries of the diameter grid in microns. Default is the 
+            boundaries of the grid set on the OPC.
+        cache: bool, optional
+            If False, the matrix is neither looked up in nor added to the cache 
+            (e.g. for grids that are only used once). Default is True.
+
+        Returns
+        -------
+        K: np.ndarray
+            A read-only array with shape (len(grid) - 1, n_bins).
+
+        Examples
+        --------
+
+        Compute the number of particles in each OPC bin for a grid of 
+        ammonium sulfate particle counts at 50% RH
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+        >>> opc.calibrate(material="psl")
+        >>> grid = np.logspace(-1, 1, 250)
+        >>> K = opc.response_matrix(refr=complex(1.521, 0), kappa=0.53, rh=50., grid=grid)
+        >>> vals = np.ones(249) @ K
+
+        """
+        if not self.calibration_function:
+            raise Exception("The OPC must be calibrated before computing a response matrix.")
+
+        if grid is None:
+            grid = self.grid.boundaries()
+
+        grid = np.asarray(grid, dtype=float)
+
+        key = (complex(refr), float(kappa), float(rh), grid.tobytes())
+
+        self._check_response_matrices()
+
+        K = self._response_matrices.get(key) if cache else None
+
+        if K is not None:
+            self._response_matrices.move_to_end(key)
+        else:
+            # calculate the % dry based on hygroscopic growth
+            pct_dry = 1. / (k_kohler(diam_dry=1., kappa=kappa, rh=rh)**3)
+
+            # calculate the Cscat value at the midpoint of every bin at once
+            K = self._response_matrix(self._cscat(np.mean([grid[:-1], grid[1:]], axis=0), 
+                                                  refr=_ri_wet(refr, pct_dry)))
+
+            if cache:
+                self._cache_response_matrix(key, K)
+
+        return K
+
+    def _response_matrix(self, values):
+        """Return the (uncached) response matrix of a grid from the Cscat value at the 
+        midpoint of every bin; see :meth:`OPC.response_matrix`."""
+        # assign each bin to an OPC bin and drop those that fall outside of the OPC
+        bin_assign = self._assign_bins(values)
+        valid = np.where(bin_assign >= 0)[0]
+
+        K = np.zeros((bin_assign.shape[0], self.n_bins))
+        K[valid, bin_assign[valid]] = 1.
+        K.flags.writeable = False
+
+        return K
+
+    def _check_response_matrices(self):
+        """Drop the cached response matrices if a setting that changes Cscat (the 
+        wavelength, viewing angle, large-particle threshold, or lookup table) was 
+        changed since they were computed."""
+        settings = (self.wl, tuple(self.theta), self.approx_threshold, self.cscat_table)
+
+        if settings != self._response_matrix_settings:
+            self._response_matrices.clear()
+            self._response_matrix_settings = settings
+
+    def _cache_response_matrix(self, key, K):
+        """Add a response matrix to the cache, dropping the least recently used ones."""
+        self._check_response_matrices()
+        self._response_matrices[key] = K
+
+        while len(self._response_matrices) > self.max_response_matrices:
+            self._response_matrices.popitem(last=False)
+
+    def invert(self, counts, n_modes=1, refr=complex(1.5, 0), kappa=0., rh=0., x0=None, 
+               sigma=None, fit_kws={}, **kwargs):
+        """Retrieve the lognormal modes of the (dry) distribution that best explain 
+        the number of particles measured in each OPC bin.
+
+        The number, geometric mean, and geometric standard deviation of every mode 
+        are fit by non-linear least squares (see `scipy.optimize.least_squares`). 
+        The modeled counts are the particles in each bin of the diameter grid mapped 
+        through the cached response matrix (see :meth:`opcsim.OPC.response_matrix`), 
+        so no Mie calculations are needed after the first call for a given material 
+        and RH, and the Jacobian is computed analytically from the lognormal PDF at 
+        the grid boundaries.
+
+        Parameters
+        ----------
+        counts: array of floats
+            The number of particles in each bin of the OPC (#/cc). If 2-D, every row 
+            is inverted on its own and the fit of each row is used as the initial 
+            guess of the next; rows without any particles give an empty distribution.
+        n_modes: int
+            The number of modes to fit. Default is 1.
+        refr: complex or array of complex
+            The complex refractive index, either a single value or one per mode. 
+            Default is 1.5+0j.
+        kappa: float or array of floats
+            The k-kohler coefficient, either a single value or one per mode. 
+            Default is 0.
+        rh: float or array of floats
+            The relative humidity in % (0-100), either a single value or one 
+            per row of `counts`. Default is 0. Response matrices for a single RH are 
+            cached on the OPC; those for an RH per row are only kept during the call 
+            and are built from a single batch of Cscat values, interpolated on a 
+            lattice of wet refractive indices for long series (see `n_lattice`).
+        x0: array of floats, optional
+            The initial guess of (N, GM, GSD) for every mode with shape (n_modes, 3). 
+            Default is to estimate them from the moments of the histogram.
+        sigma: array of floats, optional
+            The uncertainty of each bin. Default is the square root of the counts 
+            (with empty bins set to the smallest non-zero uncertainty).
+        fit_kws: dict
+            Optional dictionary containing keyword arguments that is sent 
+            directly to scipy.optimize.least_squares.
+        grid: opcsim.LogGrid, optional
+            The diameter grid used to discretize the distribution. Grids that depend 
+            on the distribution (e.g. QuantileGrid) are not supported. Default is the 
+            grid set on the OPC.
+        bounds: tuple of floats, optional
+            Shorthand for ``grid=opcsim.LogGrid(bounds[0], bounds[1], n_bins)``.
+        n_bins: int, optional
+            The number of boundaries used with `bounds`. Default is 250.
+        n_lattice: int, optional
+            With an RH per row, Cscat is interpolated on a lattice of `n_lattice` dry 
+            volume fractions if there are more unique RH than this (see 
+            :meth:`opcsim.OPC.evaluate_many`). Default is 201.
+
+        Returns
+        -------
+        d: AerosolDistribution or list of AerosolDistribution
+            The fitted distribution, with modes sorted by GM. If `counts` is 2-D, a 
+            list with one distribution per row.
+
+        Examples
+        --------
+
+        Retrieve a single mode of ammonium sulfate from an OPC histogram
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3)
+        >>> opc.calibrate(material="psl")
+        >>> d = opcsim.AerosolDistribution()
+        >>> d.add_mode(n=1e3, gm=0.4, gsd=1.5, kappa=0.53, refr=complex(1.521, 0))
+        >>> counts = opc.evaluate(d, rh=50.)
+        >>> fit = opc.invert(counts, n_modes=1, refr=complex(1.521, 0), kappa=0.53, rh=50.)
+
+        Invert a time series of histograms
+
+        >>> counts = np.tile(counts, (100, 1))
+        >>> fits = opc.invert(counts, n_modes=1, refr=complex(1.521, 0), kappa=0.53, rh=50.)
+
+        """
+        if not self.calibration_function:
+            raise Exception("The OPC must be calibrated before inverting a histogram.")
+
+        counts = np.asarray(counts, dtype=float)
+
+        if counts.shape[-1] != self.n_bins:
+            raise ValueError("counts must have one value per OPC bin.")
+
+        n_lattice = kwargs.pop("n_lattice", 201)
+
+        grid = self._grid(**kwargs)
+
+        if grid.per_mode:
+            raise ValueError("invert needs a grid that is shared by every distribution.")
+
+        grid = grid.boundaries()
+
+        refr = np.broadcast_to(np.asarray(refr, dtype=complex), (n_modes, ))
+        kappa = np.broadcast_to(np.asarray(kappa, dtype=float), (n_modes, ))
+
+        rows = counts.reshape(-1, self.n_bins)
+        rh = np.broadcast_to(np.asarray(rh, dtype=float), rows.shape[:1])
+
+        gf = k_kohler(diam_dry=1., kappa=kappa, rh=rh[:, None])
+
+        # with one RH per row, the Cscat values of every row and mode are computed in 
+        # a single call and only live for this call so that a long time series does not 
+        # fill the cache on the instance
+        per_row = np.unique(rh).shape[0] > 1
+
+        if per_row:
+            v, lower, frac = self._wet_cscat(np.mean([grid[:-1], grid[1:]], axis=0), refr, 
+                                             1. / gf**3, n_lattice)
+
+        rv = list()
+        for j, row in enumerate(rows):
+            # empty rows (e.g. clean air or dropouts) do not stop a time series
+            if counts.ndim > 1 and row.sum() <= 0:
+                rv.append(AerosolDistribution())
+                continue
+
+            # the response matrix of every mode
+            if not per_row:
+                K = [self.response_matrix(refr=r, kappa=k, rh=rh[j], grid=grid) 
+                     for r, k in zip(refr, kappa)]
+            elif frac is None:
+                K = [self._response_matrix(v[k]) for k in lower[j]]
+            else:
+                K = [self._response_matrix((1 - f)*v[k] + f*v[k + 1]) for k, f in zip(lower[j], frac[j])]
+
+            lngf = np.log(gf[j])
+
+            params = self._fit_modes(row, K, lngf, np.log(grid), x0=x0, sigma=sigma, **fit_kws)
+
+            d = AerosolDistribution()
+            for i in np.argsort(params[:, 1]):
+                d.add_mode(n=params[i, 0], gm=params[i, 1], gsd=params[i, 2], 
+                           kappa=kappa[i], refr=complex(refr[i]))
+
+            rv.append(d)
+
+            # use the fit as the initial guess for the next row of a time series
+            x0 = params
+
+        return rv if counts.ndim > 1 else rv[0]
+
     def histogram(self, distribution, weight="number", base="log10", rh=0., **kwargs):
         """Return a histogram containing the [weight] of particles in each OPC bin.
 
@@ -318,12 +856,12 @@ class OPC(object):
 
         Parameters
         ----------
-        distribution: AerosolDistribution
+        distribution: AerosolDistribution or DistributionEnsemble
         weight : {'number' | 'surface' | 'volume'}
             Choose how to weight the pdf. Default is `number`.
         base : {'none' | 'log10'}
             Base algorithm to use. Default is 'log10'.
-        rh: float
+        rh: float or array of floats
             The relative humidity in percent (0-100).
 
         Returns
@@ -332,7 +870,9 @@ class OPC(object):
             Returns an array with the evaluated
             PDF. This data can be
             directly plotted as a histogram using matplotlib bar plots. By 
-            default, dN/dlogDp is returned.
+            default, dN/dlogDp is returned. If `rh` is an array, the result has 
+            shape (len(rh), n_bins); for an ensemble, the result has shape 
+            (n_distributions, n_bins).
 
         Examples
         --------
@@ -402,25 +942,36 @@ class OPC(object):
         example, if you calculate PM1 and the bin that contains 1-micron actually covers 0.5 
         to 1.5 microns, then 1/2 the mass from that bin will count towards the PM1 value.
 
+        Any number of breakpoints can be computed at once by passing arrays of `dmin` 
+        and `dmax`; the distribution is only evaluated once and the fraction of every 
+        OPC bin that falls within each range is computed as a single matrix.
+
         Parameters
         ----------
-        distribution: AerosolDistribution
-            The aerosol distribution to be evaluated.
-        dmin: float
+        distribution: AerosolDistribution, DistributionEnsemble, or array of floats
+            The aerosol distribution(s) to be evaluated. Alternatively, the number of 
+            particles in each OPC bin (e.g. the output of :meth:`opcsim.OPC.evaluate_many` 
+            or a measured time series) with shape (..., n_bins), in which case `rh` 
+            and any grid settings are ignored.
+        dmin: float or array of floats
             The minimum particle diameter [microns] to integrate from.
-        dmax: float
-            The maximum particle diameter [microns] to integrate to.
+        dmax: float or array of floats
+            The maximum particle diameter [microns] to integrate to. Arrays of 
+            `dmin` and `dmax` are broadcast against each other.
         weight : {'number' | 'surface' | 'volume'}
             Choose how to weight the pdf. Default is `number`.
-        rh: float
+        rh: float or array of floats
             The relative humidity in percent (0-100).
 
         Returns
         -------
-        rv: float
+        rv: float or array of floats
             The total [weight] between dmin and dmax. By default, 
             the total number of particles (i.e. weight='number') 
-            are returned.
+            are returned. If `rh` is an array (or an ensemble or a batch of 
+            histograms is given), one value is returned per RH (or distribution 
+            or histogram); if `dmin` or 
+            `dmax` are arrays, the breakpoints make up the last axes.
 
         Examples
         --------
@@ -447,14 +998,30 @@ class OPC(object):
         >>> d = opcsim.load_distribution("urban")
         >>> ntot = opc.integrate(d, dmin=0., dmax=2.5, weight="mass", rh=50., rho=1.5)
 
+        Calculate PM1, PM2.5, PM4, and PM10 for a sweep of RH's at once
+
+        >>> pm = opc.integrate(d, dmax=[1., 2.5, 4., 10.], weight="mass", 
+        ...                    rh=np.linspace(0., 95., 20), rho=1.5)
+
+        Calculate PM1 and PM10 for a time series of measured histograms
+
+        >>> counts = np.ones((100, 5))
+        >>> pm = opc.integrate(counts, dmax=[1., 10.], weight="mass", rho=1.5)
+
         """
         rho = kwargs.pop("rho", 1.65)
 
-        # calculate dN
-        rv = self.evaluate(distribution, rh=rh, **kwargs)
-
         if weight not in ["number", "surface", "volume", "mass"]:
             raise ValueError("Invalid argument for `weight`")
+
+        # calculate dN
+        if isinstance(distribution, (AerosolDistribution, DistributionEnsemble)):
+            rv = self.evaluate(distribution, rh=rh, **kwargs)
+        else:
+            rv = np.array(distribution, dtype=float)
+
+            if rv.shape[-1] != self.n_bins:
+                raise ValueError("The histograms must have one value per OPC bin.")
         
         if weight == "surface":
             # convert dN to dS
@@ -468,25 +1035,110 @@ class OPC(object):
         else:
             pass
 
-        # cleave the array
-        # for bins that are outside diameters of interest, set to 0
-        # for bins that are partially within the range of diams, set to 
-        # a fraction based on % within range
-        factors = np.zeros(self.bins.shape[0])
-        for i, b in enumerate(self.bins):
-            if (b[0] >= dmin) and (b[-1] <= dmax):
-                factors[i] = 1.
-            elif (dmin >= b[0]) and (dmax <= b[-1]):
-                factors[i] = (dmax - dmin) / (b[-1] - b[0])
-            elif (dmin >= b[0]) and (dmax >= b[-1]):
-                factors[i] = (b[-1] - dmin) / (b[-1] - b[0])
-            elif (dmax >= b[0]) and (dmax <= b[-1]):
-                factors[i] = (dmax - b[-1]) / (b[-1] / b[0])
-            else:
-                factors[i] = 0.
+        # the fraction of every bin that falls within each range of diameters, with 
+        # shape (..., n_bins) for every breakpoint
+        factors = self._overlap(dmin, dmax)
+
+        # sum over the bins; a single value is returned as a float
+        rv = (rv @ factors.reshape(-1, self.n_bins).T).reshape(rv.shape[:-1] + factors.shape[:-1])
+
+        return rv.item() if rv.ndim == 0 else rv
+
+    def save(self, path, include_kernels=True, include_table=True):
+        """Save the OPC, including its calibration, to a compressed, versioned `.npz` file.
+
+        Parameters
+        ----------
+        path: str or file-like
+            The file to write to.
+        include_kernels: bool
+            If True, the cached response matrices (at most `max_response_matrices`) 
+            are saved too, so that a loaded OPC can evaluate distributions without any 
+            Mie calculations. Default is True.
+        include_table: bool
+            If True, the Cscat lookup table (if one is set) is saved too. Default is True.
+
+        Examples
+        --------
+
+        Save a calibrated OPC and load it in another process
+
+        >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+        >>> opc.calibrate(material="psl")
+        >>> opc.save("opc.npz")
+        >>> opc = opcsim.OPC.load("opc.npz")
+
+        """
+        refr = self.calibration_refr
+        grid = dict(type=type(self.grid).__name__, params=self.grid.__dict__)
+
+        settings = _settings_to_json(self, label=self.label, grid=grid, 
+            max_response_matrices=self.max_response_matrices, 
+            calibration_refr=None if refr is None else [refr.real, refr.imag])
+
+        arrays = dict(bins=self.bins)
+
+        if self.calibration_vals is not None:
+            arrays["calibration_vals"] = np.asarray(self.calibration_vals)
+
+        if include_table and self.cscat_table is not None:
+            arrays["cscat_table"] = _table_to_bytes(self.cscat_table)
+
+        if include_kernels:
+            kernels = list()
+
+            self._check_response_matrices()
+
+            for i, (key, K) in enumerate(self._response_matrices.items()):
+                kernels.append([key[0].real, key[0].imag, key[1], key[2]])
+
+                arrays["kernel_grid_{}".format(i)] = np.frombuffer(key[3], dtype=float)
+                arrays["kernel_{}".format(i)] = K
+
+            settings["kernels"] = kernels
+
+        np.savez_compressed(path, version=self.VERSION, settings=json.dumps(settings), **arrays)
 
-        # return the sum
-        return (rv*factors).sum()
+    @classmethod
+    def load(cls, path):
+        """Load an OPC previously written with :meth:`OPC.save`.
+
+        Parameters
+        ----------
+        path: str or file-like
+            The file to read from.
+
+        Returns
+        -------
+        OPC
+
+        """
+        with np.load(path) as data:
+            settings, kwargs = _load_common(data, cls.VERSION, "OPC")
+
+            grid = getattr(grids, settings["grid"]["type"])(**settings["grid"]["params"])
+
+            opc = cls(wl=settings["wl"], bins=data["bins"], theta=tuple(settings["theta"]), 
+                      label=settings["label"], grid=grid, 
+                      max_response_matrices=settings.get("max_response_matrices", 32), **kwargs)
+
+            if "calibration_vals" in data:
+                yvals = data["calibration_vals"]
+
+                opc.calibration_function = functools.partial(opc._digitize_opc_bins, cscat_boundaries=yvals)
+                opc.calibration_refr = complex(*settings["calibration_refr"])
+                opc.calibration_vals = yvals
+                opc._cscat_boundaries = yvals
+
+            for i, (real, imag, kappa, rh) in enumerate(settings.get("kernels", [])):
+                K = data["kernel_{}".format(i)]
+                K.flags.writeable = False
+
+                key = (complex(real, imag), kappa, rh, data["kernel_grid_{}".format(i)].tobytes())
+
+                opc._cache_response_matrix(key, K)
+
+        return opc
 
     def _digitize_opc_bins(self, cscat_boundaries, values):
         """Return the bin (or bins) corresponding to the :math:`C_{scat}` value(s).
@@ -525,6 +1177,141 @@ class OPC(object):
 
         return digitized
 
+    def _grid(self, **kwargs):
+        """Return the diameter grid to use, honoring the `grid`, `bounds` and `n_bins` kwargs."""
+        if "bounds" in kwargs or "n_bins" in kwargs:
+            bounds = kwargs.pop("bounds", (self.dmin / 2, 10.))
+
+            return LogGrid(dmin=bounds[0], dmax=bounds[1], n_bins=kwargs.pop("n_bins", 250))
+
+        return kwargs.pop("grid", self.grid)
+
+    def _cscat(self, dps, refr, **kwargs):
+        """Return Cscat for an array of diameters, using the lookup table if one is set."""
+        if self.cscat_table is not None and not kwargs:
+            return self.cscat_table(dps, refr=refr)
+
+        kwargs.setdefault("approx_threshold", self.approx_threshold)
+
+        return cscat_many(dps, wl=self.wl, refr=refr, theta1=self.theta[0], 
+                          theta2=self.theta[1], cache=self.cache, **kwargs)
+
+    def _wet_cscat(self, diams, refr, pct_dry, n_lattice):
+        """Return the Cscat values at `diams` of particles with the dry refractive index 
+        `refr` that are `pct_dry` dry, for every entry of the broadcast arrays.
+
+        The values are returned as a (n_values, len(diams)) table along with the row of 
+        the table of every entry. If there are more unique wet refractive indices than 
+        `n_lattice` per material, the table holds a lattice of dry volume fractions 
+        instead and the fraction of the way to the next row is returned too (otherwise 
+        it is None), so the amount of Mie work does not depend on the number of entries.
+        """
+        ri = _ri_wet(refr, pct_dry)
+
+        ri_unique, groups = np.unique(ri.ravel(), return_inverse=True)
+        refr_unique, materials = np.unique(np.broadcast_to(refr, ri.shape).ravel(), return_inverse=True)
+
+        if ri_unique.shape[0] <= refr_unique.shape[0]*n_lattice:
+            # compute the Cscat values for every unique refractive index in one call
+            return (self._cscat(np.broadcast_to(diams, (ri_unique.shape[0], diams.shape[0])), 
+                                refr=ri_unique[:, None]), groups.reshape(ri.shape), None)
+
+        # compute the Cscat values of every material on a lattice of dry volume fractions
+        lattice = _ri_wet(refr_unique[:, None], np.linspace(0., 1., n_lattice)).ravel()
+
+        v = self._cscat(np.broadcast_to(diams, (lattice.shape[0], diams.shape[0])), 
+                        refr=lattice[:, None])
+
+        # the lattice cell and the position within it of every entry
+        pos = np.clip(np.broadcast_to(pct_dry, ri.shape), 0., 1.)*(n_lattice - 1)
+        cell = np.minimum(pos.astype(int), n_lattice - 2)
+
+        return v, materials.reshape(ri.shape)*n_lattice + cell, pos - cell
+
+    def _fit_modes(self, counts, K, lngf, lnd, x0=None, sigma=None, **kwargs):
+        """Fit (N, GM, GSD) of every mode to a single histogram; see :meth:`OPC.invert`."""
+        n_modes = len(K)
+
+        if counts.sum() <= 0:
+            raise ValueError("counts must contain at least one particle.")
+
+        if sigma is None:
+            sigma = np.sqrt(counts)
+            sigma[sigma == 0] = sigma[sigma > 0].min()
+
+        if x0 is None:
+            x0 = list()
+
+            # split the bins into one contiguous group per mode and use their moments
+            lnmid = np.log(self.midpoints) - lngf.mean()
+
+            for group in np.array_split(np.arange(self.n_bins), n_modes):
+                w = counts[group] if counts[group].sum() > 0 else None
+
+                mu = np.average(lnmid[group], weights=w)
+                var = np.average((lnmid[group] - mu)**2, weights=w)
+
+                x0.append([max(counts[group].sum(), 1e-6*counts.sum()), np.exp(mu), 
+                           np.clip(np.exp(np.sqrt(var)), 1.2, 3.)])
+
+        # fit ln(N), ln(GM), and ln(ln(GSD)) so every parameter stays in range
+        x0 = np.asarray(x0, dtype=float).reshape(n_modes, 3)
+        p0 = np.column_stack((np.log(x0[:, 0]), np.log(x0[:, 1]), np.log(np.log(x0[:, 2]))))
+
+        lo = np.tile([-np.inf, -np.inf, np.log(np.log(1.01))], n_modes)
+        hi = np.tile([np.inf, np.inf, np.log(np.log(5.))], n_modes)
+
+        def f(p):
+            lnn, lngm, lns = p.reshape(n_modes, 3).T[..., None]
+            s = np.exp(lns)
+
+            # the standard normal CDF and PDF at every (wet) grid boundary
+            z = (lnd - lngm - lngf[:, None]) / s
+            phi = np.exp(-0.5*z**2) / np.sqrt(2*np.pi)
+
+            # the counts in each grid bin and their derivatives w.r.t. each parameter
+            parts = np.exp(lnn)[:, None] * np.diff(np.stack([ndtr(z), -phi/s, -phi*z], axis=1), axis=-1)
+
+            # map everything onto the OPC bins
+            parts = np.stack([each @ k for each, k in zip(parts, K)])
+
+            return parts[:, 0].sum(axis=0), parts.reshape(-1, self.n_bins).T
+
+        res = scipy.optimize.least_squares(
+            lambda p: (f(p)[0] - counts) / sigma, np.clip(p0.ravel(), lo, hi), 
+            jac=lambda p: f(p)[1] / sigma[:, None], bounds=(lo, hi), **kwargs)
+
+        p = res.x.reshape(n_modes, 3)
+
+        return np.column_stack((np.exp(p[:, 0]), np.exp(p[:, 1]), np.exp(np.exp(p[:, 2]))))
+
+    def _overlap(self, dmin, dmax):
+        """Return the fraction of every OPC bin that falls between `dmin` and `dmax`.
+
+        The result has shape (..., n_bins), where the leading axes are the broadcast 
+        shape of `dmin` and `dmax`.
+        """
+        dmin, dmax = np.broadcast_arrays(np.asarray(dmin, dtype=float)[..., None], 
+                                         np.asarray(dmax, dtype=float)[..., None])
+
+        lo, hi = self.bins[:, 0], self.bins[:, -1]
+
+        return np.clip(np.minimum(dmax, hi) - np.maximum(dmin, lo), 0., None) / (hi - lo)
+
+    def _assign_bins(self, values):
+        """Return the bin corresponding to every :math:`C_{scat}` value, with -1 
+        for values that fall outside of the OPC.
+
+        Unlike the calibration function, the returned array always has the same 
+        size as `values`, which makes it suitable for vectorized accumulation.
+        """
+        _binb = np.asarray(self._cscat_boundaries)
+
+        digitized = np.digitize(np.asarray(values), bins=_binb) - 1
+        digitized[(digitized < 0) | (digitized >= len(_binb) - 1)] = -1
+
+        return digitized
+
     def __repr__(self): # pragma: no cover
         return str(self.__class__)
 
@@ -532,6 +1319,8 @@ class OPC(object):
 class Nephelometer(object):
     """Define a Nephelometer by its wavelength and range of viewing angles.
     """
+    VERSION = 1
+
     def __init__(self, wl, theta=(7., 173.), **kwargs):
         """
         Parameters
@@ -540,6 +1329,24 @@ class Nephelometer(object):
             The wavelength of laser used in the device
         theta: tuple of floats
             The viewing angle range in degrees
+        cscat_table: opcsim.mie.CscatTable, optional
+            A precomputed lookup table of Cscat values for this wavelength and viewing 
+            angle. If set, it is used in place of Mie theory.
+        cache: opcsim.mie.CscatCache or None, optional
+            A memoization cache for Cscat values. By default, every instance gets its 
+            own cache; set to None to disable caching.
+        method: {'direct' | 'truncation'}
+            How to compute Cscat over the viewing angle. 'direct' (default) integrates 
+            across the viewing angle. 'truncation' computes the full-sphere value from 
+            the scattering efficiency and subtracts the (small) truncated wedges 
+            outside of the viewing angle with Gauss-Legendre quadrature, which is 
+            much more accurate for wide viewing angles at about the same cost (see 
+            :func:`opcsim.mie.cscat_many`).
+        approx_threshold: float or None, optional
+            If set, particles with a size parameter above this value are computed 
+            with a large-particle approximation instead of Mie theory when 
+            method='direct'. See :func:`opcsim.mie.cscat_many` for its error bounds 
+            and the viewing angles it is used for. Default is None.
 
         Returns
         -------
@@ -553,9 +1360,22 @@ class Nephelometer(object):
 
         >>> neph = opcsim.Nephelometer(wl=0.658)
 
+        Build a nephelometer that computes its signal as the full-sphere value minus 
+        the truncated wedges
+
+        >>> neph = opcsim.Nephelometer(wl=0.658, theta=(7., 173.), method="truncation")
+
         """
         self.wl = wl
         self.theta = theta
+        self.cscat_table = _check_cscat_table(kwargs.pop("cscat_table", None), wl, theta)
+        self.cache = kwargs.pop("cache", CscatCache())
+        self.method = kwargs.pop("method", "direct")
+        self.approx_threshold = kwargs.pop("approx_threshold", None)
+
+        if self.method not in ["direct", "truncation"]:
+            raise ValueError("Invalid argument for method: ['direct', 'truncation']")
+
         self.pm1_ratio = None
         self.pm25_ratio = None
         self.pm10_ratio = None
@@ -570,6 +1390,9 @@ class Nephelometer(object):
         rh: float
             The relative humidity at which the calibration takes place.
             Default is 0 %.
+        n_per_decade: int, optional
+            The number of grid boundaries per decade of diameter used to discretize 
+            the distribution (see :meth:`opcsim.Nephelometer.evaluate`). Default is 128.
 
         Returns
         -------
@@ -588,56 +1411,163 @@ class Nephelometer(object):
         >>> neph.calibrate(d, rh=0.)
 
         """
-        n_bins = kwargs.pop("n_bins", 100)
-
         # compute the PM1, PM25, and PM10 masses
-        pm1 = distribution.cdf(dmin=0., dmax=1., weight="mass")
-        pm25 = distribution.cdf(dmin=0., dmax=2.5, weight="mass")
-        pm10 = distribution.cdf(dmin=0., dmax=10., weight="mass")
+        pm1, pm25, pm10 = distribution.moments(dmax=[1., 2.5, 10.])["mass"]
 
         # compute the total scattered light across the distribution
-        total_cscat = self._sum_across_distribution(distribution, n_bins=n_bins, rh=rh)
+        total_cscat = self._sum_across_distribution(distribution, rh=rh, **kwargs)
 
         # set the ratios
         self.pm1_ratio = total_cscat / pm1
         self.pm25_ratio = total_cscat / pm25
         self.pm10_ratio = total_cscat / pm10
 
-    def _sum_across_distribution(self, distribution, n_bins=100, rh=0., **kwargs):
+    def save(self, path, include_table=True):
+        """Save the Nephelometer, including its calibration, to a compressed, versioned 
+        `.npz` file.
+
+        Parameters
+        ----------
+        path: str or file-like
+            The file to write to.
+        include_table: bool
+            If True, the Cscat lookup table (if one is set) is saved too. Default is True.
+
+        Examples
+        --------
+
+        >>> neph = opcsim.Nephelometer(wl=0.658)
+        >>> neph.calibrate(opcsim.load_distribution("urban"))
+        >>> neph.save("neph.npz")
+        >>> neph = opcsim.Nephelometer.load("neph.npz")
+
         """
+        settings = _settings_to_json(self, method=self.method, pm1_ratio=self.pm1_ratio, 
+            pm25_ratio=self.pm25_ratio, pm10_ratio=self.pm10_ratio)
+
+        arrays = dict()
+
+        if include_table and self.cscat_table is not None:
+            arrays["cscat_table"] = _table_to_bytes(self.cscat_table)
+
+        np.savez_compressed(path, version=self.VERSION, settings=json.dumps(settings), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Load a Nephelometer previously written with :meth:`Nephelometer.save`.
+
+        Parameters
+        ----------
+        path: str or file-like
+            The file to read from.
+
+        Returns
+        -------
+        Nephelometer
+
         """
-        total_cscat = 0.
+        with np.load(path) as data:
+            settings, kwargs = _load_common(data, cls.VERSION, "Nephelometer")
 
-        for m in distribution.modes:
-            gm = m["GM"]
-            gsd = m["GSD"]
-            refr = m["refr"]
+        neph = cls(wl=settings["wl"], theta=tuple(settings["theta"]), method=settings["method"], 
+                   **kwargs)
 
-            # alter the GM and RI per the RH specifed
-            gm = k_kohler(diam_dry=gm, kappa=m["kappa"], rh=rh)
+        neph.pm1_ratio = settings["pm1_ratio"]
+        neph.pm25_ratio = settings["pm25_ratio"]
+        neph.pm10_ratio = settings["pm10_ratio"]
 
-            pct_dry = m["GM"]**3 / gm**3
+        return neph
 
-            refr = ri_eff(species=[refr, RI_COMMON["h2o"]], weights=[pct_dry, 1-pct_dry])
+    def _sum_across_distribution(self, distribution, rh=0., **kwargs):
+        """Return the total Cscat of the distribution at one or more RH's.
 
-            # compute the bounds
-            bounds = np.logspace(start=np.log10(gm/(gsd**4)), stop=np.log10(gm*(gsd**4)), num=n_bins)
+        The distribution is evaluated as an ensemble with one copy per RH, so it is 
+        discretized exactly like every distribution of an ensemble.
+        """
+        rh = np.asarray(rh, dtype=float)
+        modes = distribution.modes
 
-            # compute the midpoints of each bin
-            midpoints = np.mean([bounds[:-1], bounds[1:]], axis=0)
+        # one copy of the distribution per RH
+        params = [np.tile([m[key] for m in modes], (rh.size, 1)) for key in ("N", "GM", "GSD")]
 
-            # compute the number of particles in each bin
-            n = np.array([distribution.cdf(dmin=a, dmax=b, mode=m["label"], rh=rh)
-                          for a, b in zip(bounds[:-1], bounds[1:])])
-            
-            # compute the mean Cscat for each bin
-            mean_cscat = np.array([cscat(dp, wl=self.wl, refr=refr,
-                                    theta1=self.theta[0], theta2=self.theta[1]) for dp in midpoints])
-            
-            # add to the running total
-            total_cscat += (n*mean_cscat).sum()
+        ensemble = DistributionEnsemble(*params, kappa=[m["kappa"] for m in modes], 
+                                        refr=[m["refr"] for m in modes])
+
+        return self._sum_across_ensemble(ensemble, rh=rh.ravel(), **kwargs).reshape(rh.shape)[()]
+
+    def _sum_across_ensemble(self, ensemble, rh=0., n_per_decade=128):
+        """Return the total Cscat of every distribution in an ensemble.
+
+        Every (wet) mode is discretized between +/- 4 GSD's on a log lattice with 
+        `n_per_decade` boundaries per decade that is shared by all modes, so a 
+        distribution gives the same result on its own as in any ensemble. Cscat is 
+        computed once per unique wet refractive index and lattice point, and only 
+        for the lattice points covered by the modes with that refractive index.
+        """
+        gf = ensemble.growth_factor(rh)
+        gm = ensemble.gm * gf
+        gsd = ensemble.gsd
+
+        if gm.size == 0:
+            return np.zeros(len(ensemble))
+
+        # the first and last lattice boundary of every (wet) mode
+        k0 = np.floor(np.log10(gm / gsd**4) * n_per_decade).astype(int)
+        k1 = np.maximum(np.ceil(np.log10(gm * gsd**4) * n_per_decade).astype(int), k0 + 1)
+
+        kmin = k0.min()
+        bounds = 10**(np.arange(kmin, k1.max() + 1) / n_per_decade)
+
+        ri_unique, groups = np.unique(_ri_wet(ensemble.refr, 1. / gf**3).ravel(), return_inverse=True)
+        groups = groups.reshape(gm.shape)
+
+        # the range of lattice bins needed by every unique refractive index
+        lo = np.full(ri_unique.shape[0], k1.max())
+        hi = np.full(ri_unique.shape[0], kmin)
+        np.minimum.at(lo, groups.ravel(), k0.ravel())
+        np.maximum.at(hi, groups.ravel(), k1.ravel())
+
+        # compute the Cscat values of every needed (refractive index, bin) pair in one call
+        sizes = hi - lo
+        ri_idx = np.repeat(np.arange(ri_unique.shape[0]), sizes)
+        bins = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes) + np.repeat(lo - kmin, sizes)
+
+        diams = np.mean([bounds[:-1], bounds[1:]], axis=0)
+
+        v = np.zeros((ri_unique.shape[0], diams.shape[0]))
+        v[ri_idx, bins] = self._cscat(diams[bins], refr=ri_unique[ri_idx])
+
+        total_cscat = np.zeros(len(ensemble))
+        k = np.arange(kmin, k1.max())
+
+        for i in range(ensemble.n_modes):
+            n = np.diff(nt(ensemble.n[:, i, None], gm[:, i, None], gsd[:, i, None], 
+                           dmax=bounds), axis=-1)
+
+            # only count the bins within the range of each mode
+            n[(k < k0[:, i, None]) | (k >= k1[:, i, None])] = 0.
+
+            total_cscat += np.einsum("ij,ij->i", n, v[groups[:, i]])
 
         return total_cscat
+
+    def _cscat(self, dps, refr, **kwargs):
+        """Return Cscat for an array of diameters, using the lookup table if one is set."""
+        if self.cscat_table is not None and not kwargs:
+            return self.cscat_table(dps, refr=refr)
+
+        if self.method == "truncation":
+            return self._cscat_truncated(dps, refr=refr)
+
+        kwargs.setdefault("approx_threshold", self.approx_threshold)
+
+        return cscat_many(dps, wl=self.wl, refr=refr, theta1=self.theta[0], 
+                          theta2=self.theta[1], cache=self.cache, **kwargs)
+
+    def _cscat_truncated(self, dps, refr):
+        """Return Cscat as the full-sphere value minus the wedges outside the viewing angle."""
+        return cscat_many(dps, wl=self.wl, refr=refr, theta1=self.theta[0], theta2=self.theta[1], 
+                          method="truncation", quadrature="gauss", cache=self.cache)
     
     def evaluate(self, distribution, rh=0., **kwargs):
         """Evaluate a Nephelometer for an AerosolDistribution at 
@@ -645,11 +1575,17 @@ class Nephelometer(object):
 
         Parameters
         ----------
-        distribution: opcsim.AerosolDistribution
-            The aerosol distribution used to calibrate the Nephelometer.
-        rh: float
+        distribution: opcsim.AerosolDistribution or opcsim.DistributionEnsemble
+            The aerosol distribution used to calibrate the Nephelometer. For an 
+            ensemble, each returned value is an array with one entry per distribution.
+        rh: float or array of floats
             The relative humidity at which the calibration takes place.
-            Default is 0 %.
+            Default is 0 %. If an array, every RH is evaluated at once and 
+            each returned value is an array with one entry per RH. For an ensemble, 
+            either a single value or one per distribution.
+        n_per_decade: int, optional
+            The number of grid boundaries per decade of diameter used to discretize 
+            the distributions. Default is 128.
 
         Returns
         -------
@@ -678,8 +1614,21 @@ class Nephelometer(object):
         >>>
         >>> neph.evaluate(d, rh=85.)
 
+        Evaluate the same Nephelometer across a range of RH's
+
+        >>> cscat, pm1, pm25, pm10 = neph.evaluate(d, rh=np.linspace(0., 95., 20))
+
+        Evaluate the same Nephelometer for an ensemble of distributions
+
+        >>> e = opcsim.DistributionEnsemble(n=np.full(1000, 1e3), gm=np.linspace(0.1, 0.5, 1000), 
+        ...                                 gsd=np.full(1000, 1.25), kappa=0.53, refr=complex(1.521, 0))
+        >>> cscat, pm1, pm25, pm10 = neph.evaluate(e, rh=85.)
+
         """
-        total_cscat = self._sum_across_distribution(distribution, rh=rh, **kwargs)
+        if isinstance(distribution, DistributionEnsemble):
+            total_cscat = self._sum_across_ensemble(distribution, rh=rh, **kwargs)
+        else:
+            total_cscat = self._sum_across_distribution(distribution, rh=rh, **kwargs)
 
         pm1 = total_cscat / self.pm1_ratio
         pm25 = total_cscat / self.pm25_ratio
@@ -6,7 +6,7 @@ import itertools
 
 from .distributions import AerosolDistribution
 from .models import OPC
-from .mie import cscat
+from .mie import cscat_many
 
 lrg_number_fmt = mtick.ScalarFormatter()
 lrg_number_fmt.set_powerlimits((-3, 4))
@@ -440,8 +440,8 @@ def calplot(opc, ax=None, plot_kws={}, fig_kws={}, **kwargs):
     plot_kws = dict(default_plot_kws, **plot_kws)
 
     # compute the Cscat values
-    yvals = np.array([cscat(x, wl=opc.wl, refr=opc.calibration_refr,
-                            theta1=opc.theta[0], theta2=opc.theta[1]) for x in xs])
+    yvals = cscat_many(xs, wl=opc.wl, refr=opc.calibration_refr,
+                       theta1=opc.theta[0], theta2=opc.theta[1])
     
     cp = sns.color_palette()
     cc = map("C{}".format, itertools.cycle(range(len(cp))))
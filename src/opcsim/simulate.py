@@ -0,0 +1,356 @@
+"""Contains the particle-by-particle (Monte Carlo) simulations of an OPC.
+"""
+
+import numpy as np
+import collections
+
+from .models import _ri_wet
+from .utils import k_kohler
+
+
+Pulses = collections.namedtuple("Pulses", ["dp", "cscat", "signal", "bins"])
+Registered = collections.namedtuple("Registered", ["counts", "arrived", "registered"])
+
+
+def _cscat_tables(opc, distribution, rh, n_points, dmax):
+    """Return the (log diameter, log Cscat) lookup table of every (wet) mode."""
+    tables = list()
+
+    for m in distribution.modes:
+        gf = k_kohler(diam_dry=1., kappa=m["kappa"], rh=rh)
+
+        # cover +/- 7 standard deviations, but never go past dmax
+        hi = min(np.log10(m["GM"]*gf) + 7*np.log10(m["GSD"]), np.log10(dmax))
+        lo = min(np.log10(m["GM"]*gf) - 7*np.log10(m["GSD"]), hi - 1.)
+
+        dps = np.logspace(lo, hi, n_points)
+        cscat = opc._cscat(dps, refr=_ri_wet(m["refr"], 1. / gf**3))
+
+        tables.append((np.log(dps), np.log(cscat)))
+
+    return tables
+
+
+def _lookup(log_dp, x, y):
+    """Interpolate a lookup table in log-log space, extrapolating with the Rayleigh 
+    (dp^6) and geometric (dp^2) limits beyond its ends."""
+    rv = np.interp(log_dp, x, y)
+    rv += 6.*np.minimum(log_dp - x[0], 0.) + 2.*np.maximum(log_dp - x[-1], 0.)
+
+    return rv
+
+
+def _particle_sampler(opc, distribution, rh, table_size, table_dmax):
+    """Return the total number concentration of a distribution and a function that 
+    draws the (wet) diameter and Cscat of `size` random particles from it."""
+    modes = distribution.modes
+    n = np.array([m["N"] for m in modes], dtype=float)
+
+    # the (wet) lognormal parameters of every mode
+    log_gm = np.log(k_kohler(diam_dry=np.array([m["GM"] for m in modes]), 
+                             kappa=np.array([m["kappa"] for m in modes]), rh=rh))
+    log_gsd = np.log([m["GSD"] for m in modes])
+
+    tables = _cscat_tables(opc, distribution, rh=rh, n_points=table_size, dmax=table_dmax)
+
+    def draw(rng, size):
+        # draw the mode and diameter of every particle
+        mode = rng.choice(len(modes), size=size, p=n / n.sum())
+        log_dp = log_gm[mode] + log_gsd[mode]*rng.standard_normal(size)
+
+        cscat = np.empty(size)
+
+        for i, (x, y) in enumerate(tables):
+            idx = mode == i
+            cscat[idx] = np.exp(_lookup(log_dp[idx], x, y))
+
+        return np.exp(log_dp), cscat
+
+    return n.sum(), draw
+
+
+def _measure(rng, cscat, noise=0., noise_floor=0., adc_bits=None, adc_max=None):
+    """Return the signal measured for an array of pulses after detector noise and 
+    ADC quantization."""
+    signal = cscat
+
+    if noise:
+        signal = signal * (1. + noise*rng.standard_normal(cscat.shape[0]))
+
+    if noise_floor:
+        signal = signal + noise_floor*rng.standard_normal(cscat.shape[0])
+
+    # digitize the signal
+    if adc_bits is not None:
+        lsb = adc_max / 2**adc_bits
+        signal = np.clip(np.floor(signal / lsb), 0, 2**adc_bits - 1) * lsb
+
+    return signal
+
+
+def _pop_settings(opc, kwargs):
+    """Pop the detector and lookup table settings shared by every simulation."""
+    detector = dict(
+        noise=kwargs.pop("noise", 0.),
+        noise_floor=kwargs.pop("noise_floor", 0.),
+        adc_bits=kwargs.pop("adc_bits", None),
+        adc_max=kwargs.pop("adc_max", opc._cscat_boundaries[-1]))
+
+    table = dict(
+        table_size=kwargs.pop("table_size", 1000),
+        table_dmax=kwargs.pop("table_dmax", 2*opc.dmax))
+
+    return detector, table
+
+
+def iter_pulses(opc, distribution, volume, rh=0., chunksize=100000, seed=None, **kwargs):
+    """Simulate the individual particles an OPC sees in a sample volume, one chunk
+    at a time.
+
+    The number of particles in the sample is drawn from a Poisson distribution and
+    every particle is assigned to a mode (in proportion to its number concentration)
+    and drawn from its (wet) lognormal distribution. The scattering cross-section of
+    each particle is interpolated (in log-log space) from a lookup table computed
+    once per mode. Detector noise and ADC quantization are applied to get the
+    measured signal, which is then assigned to a bin using the OPC's calibration.
+    Since the particles are generated in fixed-size chunks, the memory used does
+    not grow with the number of particles.
+
+    Parameters
+    ----------
+    opc: opcsim.OPC
+        A calibrated OPC.
+    distribution: opcsim.AerosolDistribution
+        The aerosol distribution to sample from.
+    volume: float
+        The sampled volume in cm3.
+    rh: float
+        The relative humidity in % (0-100). Default is 0.
+    chunksize: int
+        The number of particles in every chunk. Default is 100000.
+    seed: int or None
+        The seed for the random number generator. Default is None.
+    noise: float, optional
+        The standard deviation of the (gaussian) detector noise, relative to the
+        signal. Default is 0.
+    noise_floor: float, optional
+        The standard deviation of the (gaussian) detector noise that does not
+        depend on the signal, in the same units as Cscat (cm2). Default is 0.
+    adc_bits: int or None, optional
+        If set, the signal is digitized by an ADC with this resolution. Default is None.
+    adc_max: float, optional
+        The full-scale value of the ADC in the same units as Cscat (cm2); signals
+        above it saturate. Default is the upper boundary of the last bin.
+    table_size: int, optional
+        The number of diameters in the Cscat lookup table of each mode. Default is 1000.
+    table_dmax: float, optional
+        The largest diameter (microns) in the lookup tables; above it, Cscat is 
+        extrapolated as proportional to :math:`D_p^2`. Default is twice the upper 
+        boundary of the OPC.
+
+    Returns
+    -------
+    generator of Pulses
+        Every chunk is a namedtuple of arrays with the diameter (`dp`), true
+        scattering cross-section (`cscat`), measured signal (`signal`), and assigned
+        bin (`bins`, -1 if outside the OPC) of each particle.
+
+    Examples
+    --------
+
+    Simulate the particles in 1 cm3 of the Urban distribution with 10% detector
+    noise and a 12-bit ADC
+
+    >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+    >>> opc.calibrate(material="psl")
+    >>> d = opcsim.load_distribution("urban")
+    >>> for chunk in opcsim.simulate.iter_pulses(opc, d, volume=1., noise=0.1, adc_bits=12, seed=0):
+    ...     print(chunk.signal.max())
+
+    """
+    if not opc.calibration_function:
+        raise Exception("The OPC must be calibrated before simulating particles.")
+
+    detector, table = _pop_settings(opc, kwargs)
+
+    rng = np.random.default_rng(seed)
+
+    ntot, draw = _particle_sampler(opc, distribution, rh=rh, **table)
+
+    remaining = rng.poisson(ntot * volume)
+
+    while remaining > 0:
+        size = min(chunksize, remaining)
+
+        dp, cscat = draw(rng, size)
+        signal = _measure(rng, cscat, **detector)
+
+        yield Pulses(dp, cscat, signal, opc._assign_bins(signal))
+
+        remaining -= size
+
+
+def simulate_counts(opc, distribution, volume, rh=0., **kwargs):
+    """Return the number of particles counted in each bin of an OPC for a sample volume,
+    simulated particle by particle.
+
+    Unlike :meth:`opcsim.OPC.evaluate`, which is the expected value, the result includes
+    counting statistics as well as any detector noise and ADC quantization. Takes the
+    same arguments as :func:`opcsim.simulate.iter_pulses`.
+
+    Returns
+    -------
+    counts: np.ndarray of ints
+        The number of particles counted in each OPC bin.
+
+    Examples
+    --------
+
+    Count the particles in 10 cm3 of the Urban distribution and compare to the
+    expected number concentrations
+
+    >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+    >>> opc.calibrate(material="psl")
+    >>> d = opcsim.load_distribution("urban")
+    >>> counts = opcsim.simulate.simulate_counts(opc, d, volume=10., seed=0)
+    >>> expected = opc.evaluate(d) * 10.
+
+    """
+    counts = np.zeros(opc.n_bins, dtype=np.int64)
+
+    for chunk in iter_pulses(opc, distribution, volume, rh=rh, **kwargs):
+        counts += np.bincount(chunk.bins[chunk.bins >= 0], minlength=opc.n_bins)
+
+    return counts
+
+
+def simulate_coincidence(opc, distribution, flow_rate, duration, rh=0., transit_time=2e-6, 
+                         dead_time=0., chunksize=100000, seed=None, **kwargs):
+    """Simulate the particles an OPC registers over time, including coincidence and 
+    dead time.
+
+    Particles arrive at the sensing volume as a Poisson process with a rate equal to 
+    the number concentration times the flow rate, and each one produces a pulse that 
+    lasts `transit_time`. Particles that arrive while an earlier pulse is still in the 
+    beam merge into a single pulse whose amplitude is the sum of theirs (coincidence). 
+    After every pulse, the electronics are dead for `dead_time`, and any particle that 
+    arrives in the meantime is lost and extends the dead time (a paralyzable 
+    detector). Only the first (possibly merged) pulse of every such busy period is 
+    registered, and its signal is assigned to a bin like any other.
+
+    Arrivals are generated and grouped in fixed-size vectorized chunks (only the time 
+    of the last arrival and the pulse still in the beam are carried over between 
+    chunks), so millions of particles per second of simulated time are handled with 
+    constant memory.
+
+    Parameters
+    ----------
+    opc: opcsim.OPC
+        A calibrated OPC.
+    distribution: opcsim.AerosolDistribution
+        The aerosol distribution to sample from.
+    flow_rate: float
+        The sample flow rate through the sensing volume in cm3/s.
+    duration: float
+        The length of the simulation in seconds.
+    rh: float
+        The relative humidity in % (0-100). Default is 0.
+    transit_time: float
+        The time it takes a particle to cross the beam in seconds. Default is 2e-6.
+    dead_time: float
+        The dead time of the electronics after every pulse in seconds. Default is 0.
+    chunksize: int
+        The number of particles in every chunk. Default is 100000.
+    seed: int or None
+        The seed for the random number generator. Default is None.
+
+    Additional keyword arguments (detector noise, ADC, and lookup table settings) are 
+    the same as in :func:`opcsim.simulate.iter_pulses`; the noise is applied to every 
+    registered pulse.
+
+    Returns
+    -------
+    Registered
+        A namedtuple with the number of pulses registered in each OPC bin (`counts`), 
+        the total number of particles that arrived (`arrived`), and the total number 
+        of pulses that were registered, whether or not they fell in a bin (`registered`).
+
+    Examples
+    --------
+
+    Simulate 1 second of an OPC sampling 1 L/min of a heavily polluted atmosphere
+
+    >>> opc = opcsim.OPC(wl=0.658, n_bins=5)
+    >>> opc.calibrate(material="psl")
+    >>> d = opcsim.AerosolDistribution()
+    >>> d.add_mode(n=5e4, gm=0.4, gsd=1.5)
+    >>> rv = opcsim.simulate.simulate_coincidence(opc, d, flow_rate=1000./60, duration=1., 
+    ...                                           transit_time=2e-6, dead_time=5e-6, seed=0)
+    >>> efficiency = rv.registered / rv.arrived
+
+    """
+    if not opc.calibration_function:
+        raise Exception("The OPC must be calibrated before simulating particles.")
+
+    detector, table = _pop_settings(opc, kwargs)
+
+    rng = np.random.default_rng(seed)
+
+    ntot, draw = _particle_sampler(opc, distribution, rh=rh, **table)
+
+    rate = ntot * flow_rate
+
+    counts = np.zeros(opc.n_bins, dtype=np.int64)
+    arrived, registered = 0, 0
+
+    # the state carried between chunks: the time of the last arrival, and the summed 
+    # amplitude of the pulse that is still in the beam and whether it will be registered
+    t_last, open_amp, open_registered = -np.inf, 0., False
+    t0, done = 0., rate <= 0
+
+    while not done:
+        _, cscat = draw(rng, chunksize)
+        t = t0 + np.cumsum(rng.exponential(1. / rate, chunksize))
+        t0 = t[-1]
+
+        if t0 > duration:
+            keep = t <= duration
+            t, cscat = t[keep], cscat[keep]
+            done = True
+
+        arrived += t.shape[0]
+        amplitude = np.zeros(0)
+
+        if t.shape[0] > 0:
+            # pulses merge if they overlap in the beam; busy periods also span the dead time
+            gaps = np.diff(t, prepend=t_last)
+            starts = np.flatnonzero(gaps > transit_time)
+            busy = gaps[starts] > transit_time + dead_time
+
+            if starts.shape[0] == 0:
+                open_amp += cscat.sum()
+            else:
+                # the pulse left over from the previous chunk is now complete
+                open_amp += cscat[:starts[0]].sum()
+
+                amp = np.add.reduceat(cscat, starts)
+
+                # keep the first pulse of each busy period; the last pulse stays open
+                amplitude = np.concatenate(([open_amp] if open_registered else [], 
+                                            amp[:-1][busy[:-1]]))
+
+                open_amp, open_registered = amp[-1], busy[-1]
+
+            t_last = t[-1]
+
+        if done and open_registered:
+            amplitude = np.append(amplitude, open_amp)
+
+        # measure and bin the registered pulses
+        signal = _measure(rng, amplitude, **detector)
+        bins = opc._assign_bins(signal)
+
+        counts += np.bincount(bins[bins >= 0], minlength=opc.n_bins)
+        registered += amplitude.shape[0]
+
+    return Registered(counts, arrived, registered)
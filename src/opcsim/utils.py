@@ -117,11 +117,11 @@ def k_kohler(diam_dry, kappa=0., rh=0.):
 
     Parameters
     ----------
-    diameter_dry: float
+    diameter_dry: float or array of floats
         The dry diameter in any units (nm or um most likely)
-    kappa: float, optional
+    kappa: float or array of floats, optional
         The effective kappa value
-    rh: float: optional
+    rh: float or array of floats, optional
         The relative humidity as a percentage (0.0-100.0)
 
     Returns
@@ -133,7 +133,24 @@ def k_kohler(diam_dry, kappa=0., rh=0.):
     # calculate the water activity
     aw = rh / 100.
 
-    return diam_dry * math.pow(1 + kappa * (aw / (1 - aw)), 1./3.)
+    return diam_dry * np.power(1 + kappa * (aw / (1 - aw)), 1./3.)
+
+
+def _volume_weights(weights=None, diams=None):
+    """Return the volumetric weights, computing them from `diams` if set."""
+    if diams is not None:
+        diams = np.asarray(diams, dtype=float)
+
+        return (diams**3) / (diams**3).sum(axis=-1, keepdims=True)
+
+    return np.asarray(weights, dtype=float)
+
+
+def _weighted_sum(values, weights):
+    """Return the weighted sum over the last (species) axis, as a scalar for 1-D input."""
+    rv = (np.asarray(values) * weights).sum(axis=-1)
+
+    return rv.item() if rv.ndim == 0 else rv
 
 
 def rho_eff(rho, weights=None, diams=None):
@@ -142,6 +159,9 @@ def rho_eff(rho, weights=None, diams=None):
     an array of diameters can be passed which will be used to 
     calculate the volumetric weights.
 
+    The species make up the last axis of every array; any leading axes 
+    (e.g. particles or RH's) are broadcast against each other.
+
     Parameters
     ----------
     rho: ndarray of floats
@@ -153,19 +173,20 @@ def rho_eff(rho, weights=None, diams=None):
     
     Returns
     -------
-    rho_eff: float
-        The weighted density of the wet particle.
-    """
-    rho = np.asarray(rho)
+    rho_eff: float or ndarray of floats
+        The weighted density of the wet particle(s).
 
-    # if diams are present, compute their weights
-    if diams is not None:
-        diams = np.asarray(diams)
-        weights = (diams**3) / (diams**3).sum()
+    Examples
+    --------
+
+    Compute the density of ammonium sulfate particles with a dry diameter of 
+    0.2 microns at a range of wet diameters
 
-    weights = np.asarray(weights)
+    >>> wet = np.linspace(0.2, 0.4, 10)
+    >>> rho = opcsim.utils.rho_eff([1.77, 1.], diams=np.stack(np.broadcast_arrays(0.2, wet - 0.2), axis=-1))
 
-    return (weights * rho).sum()
+    """
+    return _weighted_sum(np.asarray(rho, dtype=float), _volume_weights(weights, diams))
 
 
 def k_eff(kappas, weights=None, diams=None):
@@ -178,6 +199,9 @@ def k_eff(kappas, weights=None, diams=None):
 
         \kappa=\sum_{i=1} \epsilon_i \kappa_i
 
+    The species make up the last axis of every array; any leading axes 
+    (e.g. particles) are broadcast against each other.
+
     Parameters
     ----------
     kappas: ndarray
@@ -189,19 +213,10 @@ def k_eff(kappas, weights=None, diams=None):
     
     Returns
     -------
-    k_eff: float
-        The effective k-kohler coefficient.
+    k_eff: float or ndarray
+        The effective k-kohler coefficient(s).
     """
-    kappas = np.asarray(kappas)
-
-    # if diams are present, compute their weights
-    if diams is not None:
-        diams = np.asarray(diams)
-        weights = (diams**3) / (diams**3).sum()
-
-    weights = np.asarray(weights)
-
-    return (kappas * weights).sum()
+    return _weighted_sum(np.asarray(kappas, dtype=float), _volume_weights(weights, diams))
 
 
 def ri_eff(species, weights=None):
@@ -214,6 +229,9 @@ def ri_eff(species, weights=None):
 
         n_{eff}=\sum_{i=1}^{N} \\frac{V_i}{V_{total}}*n_i
 
+    The species make up the last axis of every array; any leading axes 
+    (e.g. particles or RH's) are broadcast against each other.
+
     Parameters
     ----------
     species: ndarray
@@ -223,17 +241,22 @@ def ri_eff(species, weights=None):
     
     Returns
     -------
-    ri_eff: float
+    ri_eff: complex or ndarray of complex
         The effective refractive index.
-    """
-    species = np.asarray(species)
-    weights = np.asarray(weights)
 
-    # calculate the real and imag parts separately
-    real = (species.real * weights).sum()
-    imag = (species.imag * weights).sum()
+    Examples
+    --------
+
+    Compute the refractive index of wet ammonium sulfate at several water contents
+
+    >>> pct_dry = np.linspace(0.1, 1., 10)
+    >>> ri = opcsim.utils.ri_eff([complex(1.521, 0), complex(1.333, 0)], 
+    ...                          weights=np.stack([pct_dry, 1 - pct_dry], axis=-1))
+
+    """
+    rv = _weighted_sum(np.asarray(species, dtype=complex), np.asarray(weights, dtype=float))
 
-    return complex(real, imag)
+    return complex(rv) if np.ndim(rv) == 0 else rv
 
 
 def power_law_fit(diams, cscat, fit_kws={}):
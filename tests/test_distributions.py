@@ -1,7 +1,10 @@
 import unittest
 import opcsim
 import numpy as np
+import pandas as pd
 import random
+import json
+import pickle
 
 class SetupTestCase(unittest.TestCase):
     def setUp(self):
@@ -102,6 +105,25 @@ class SetupTestCase(unittest.TestCase):
         with self.assertRaises(Exception):
             d.cdf(0.1, weight='error')
 
+    def test_cdf_arrays(self):
+        d = opcsim.load_distribution("Urban")
+        bounds = np.logspace(-2, 1, 50)
+
+        for weight in ["number", "surface", "volume", "mass"]:
+            vals = d.cdf(dmin=bounds[:-1], dmax=bounds[1:], weight=weight, rh=40.)
+            ref = [d.cdf(dmin=a, dmax=b, weight=weight, rh=40.) for a, b in zip(bounds[:-1], bounds[1:])]
+
+            self.assertEqual(vals.shape, (49, ))
+            self.assertTrue(np.allclose(vals, ref))
+
+        # a dmin of zero (or below) integrates from zero
+        vals = d.cdf(dmin=np.array([-1., 0., 0.1]), dmax=2.5)
+        self.assertTrue(np.allclose(vals[:2], d.cdf(dmax=2.5)))
+        self.assertAlmostEqual(vals[2], d.cdf(dmin=0.1, dmax=2.5))
+
+        with self.assertRaises(ValueError):
+            d.cdf(dmin=bounds[1:], dmax=bounds[:-1])
+
     def test_cdf_surface(self):
         d = opcsim.load_distribution("Urban")
 
@@ -147,6 +169,136 @@ class SetupTestCase(unittest.TestCase):
         self.assertGreaterEqual(cdf_m, 3.)
         self.assertLessEqual(cdf_m, 20.)
 
+    def test_mode_views(self):
+        d = opcsim.load_distribution("Urban")
+
+        m = d._get_mode("mode ii")
+
+        self.assertEqual(m["label"], "Mode II")
+        self.assertEqual(dict(m)["GM"], 0.0373)
+
+        # writing to a mode updates the distribution
+        m["N"] = 1.
+        self.assertEqual(d.modes[1]["N"], 1.)
+        self.assertAlmostEqual(d.cdf(dmax=100., mode="Mode II"), 1.)
+
+        with self.assertRaises(KeyError):
+            m["bad-key"] = 1.
+
+        # the modes are plain dicts in a list that keeps its identity
+        self.assertIs(d.modes, d.modes)
+        self.assertIs(d.modes[1], m)
+        self.assertIsInstance(m, dict)
+        self.assertEqual(json.loads(json.dumps(d.modes, default=str))[0]["GM"], 0.0117)
+
+        # modes can only be added with add_mode
+        with self.assertRaises(TypeError):
+            d.modes.append(dict(m))
+
+        modes = d.modes
+        d.add_mode(n=10., gm=1., gsd=1.5)
+        self.assertEqual(len(modes), 4)
+
+        # pickling round-trips the distribution and its modes
+        d2 = pickle.loads(pickle.dumps(d))
+        self.assertEqual(d2.modes, d.modes)
+        d2.modes[0]["N"] = 5.
+        self.assertEqual(d2.cdf(dmax=100., mode="Mode I"), 5.)
+
+        with self.assertRaises(ValueError):
+            d.pdf(0.1, mode="none")
+
+    def test_mode_densities(self):
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e3, gm=0.2, gsd=1.5, rho=1.2, label="a")
+        d.add_mode(n=10., gm=1., gsd=1.8, rho=2.4, label="b")
+
+        # every mode uses its own density
+        total = d.cdf(dmax=10., weight="mass")
+        each = d.cdf(dmax=10., weight="mass", mode="a") + d.cdf(dmax=10., weight="mass", mode="b")
+
+        self.assertAlmostEqual(total, each)
+        self.assertAlmostEqual(d.cdf(dmax=10., weight="mass", mode="b"), 
+                               2.4*d.cdf(dmax=10., weight="volume", mode="b"))
+
+    def test_ensemble(self):
+        d = opcsim.load_distribution("Urban")
+
+        n = np.tile([m["N"] for m in d.modes], (4, 1))
+        gm = np.tile([m["GM"] for m in d.modes], (4, 1))
+        gsd = np.tile([m["GSD"] for m in d.modes], (4, 1))
+
+        e = opcsim.DistributionEnsemble(n, gm, gsd, kappa=0.3, rho=1.5)
+
+        self.assertEqual(len(e), 4)
+        self.assertEqual(e.n_modes, 3)
+
+        # every distribution matches the equivalent AerosolDistribution
+        d = e[2]
+        self.assertIsInstance(d, opcsim.AerosolDistribution)
+
+        dps = np.logspace(-2, 1, 20)
+        rh = np.array([0., 30., 60., 90.])
+
+        self.assertTrue(np.allclose(e.pdf(dps, weight="mass", rh=rh)[3], d.pdf(dps, weight="mass", rh=90.)))
+        self.assertTrue(np.allclose(e.cdf(dmax=dps, rh=rh)[1], d.cdf(dmax=dps, rh=30.)))
+        self.assertAlmostEqual(e.total(weight="volume")[0], d.cdf(dmax=1e3, weight="volume"))
+
+        self.assertEqual(e.growth_factor(rh).shape, (4, 3))
+        self.assertEqual(len(e[1:3]), 2)
+
+        df = pd.DataFrame({"N_1": [1e3, 2e3], "GM_1": [0.1, 0.12], "GSD_1": [1.5, 1.5]})
+        self.assertEqual(opcsim.DistributionEnsemble.from_dataframe(df).n.shape, (2, 1))
+
+    def test_moments(self):
+        d = opcsim.load_distribution("Urban")
+        d.add_mode(n=10., gm=1., gsd=1.8, kappa=0.1, rho=2., label="coarse")
+
+        dmax = np.array([1., 2.5, 10.])
+        m = d.moments(dmin=0.01, dmax=dmax, rh=50.)
+
+        for weight in ["number", "surface", "volume", "mass"]:
+            self.assertTrue(np.allclose(m[weight], d.cdf(dmin=0.01, dmax=dmax, weight=weight, rh=50.)))
+
+        # a single mode
+        m = d.moments(dmax=2.5, mode="coarse")
+        self.assertAlmostEqual(m["mass"], d.cdf(dmax=2.5, weight="mass", mode="coarse"))
+
+        # and an ensemble
+        e = opcsim.DistributionEnsemble([[1e3, 10.], [2e3, 5.]], [[0.1, 1.], [0.2, 1.2]], 
+                                        [[1.5, 1.8], [1.5, 1.8]], rho=1.5)
+
+        self.assertTrue(np.allclose(e.moments(dmax=dmax)["volume"], e.cdf(dmax=dmax, weight="volume")))
+
+        with self.assertRaises(ValueError):
+            d.moments(dmin=1., dmax=0.5)
+
+    def test_pdf_evaluator(self):
+        d = opcsim.load_distribution("Urban")
+        d.add_mode(n=10., gm=1., gsd=1.8, kappa=0.1, rho=2., label="coarse")
+
+        dps = np.logspace(-3, 1, 100)
+
+        # every base and weight matches the equations
+        f = d.pdf_evaluator(base='log', weight='surface', rh=50.)
+        ref = sum(opcsim.equations.pdf.ds_dlndp(dps, m["N"], opcsim.utils.k_kohler(m["GM"], m["kappa"], 50.), 
+                                                m["GSD"]) for m in d.modes)
+
+        self.assertTrue(np.allclose(f(dps), ref, rtol=1e-12))
+
+        f = d.pdf_evaluator(base=None, weight='mass', mode="coarse")
+        ref = opcsim.equations.pdf.dv_ddp(dps, 10., 1., 1.8) * 2. * 1e-6
+
+        self.assertTrue(np.allclose(f(dps), ref, rtol=1e-12))
+        self.assertEqual(f(dps.reshape(10, 10)).shape, (10, 10))
+
+        # an ensemble keeps one row per distribution
+        e = opcsim.DistributionEnsemble([[1e3, 10.], [2e3, 5.]], [[0.1, 1.], [0.2, 1.2]], [[1.5, 1.8], [1.5, 1.8]])
+        self.assertEqual(e.pdf_evaluator(weight='volume')(dps).shape, (2, 100))
+
+        with self.assertRaises(Exception):
+            d.pdf_evaluator(weight='bad-weight')
+
     def test_bad_distribution(self):
         with self.assertRaises(ValueError):
             d = opcsim.load_distribution("None")
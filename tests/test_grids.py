@@ -0,0 +1,105 @@
+import unittest
+import opcsim
+import numpy as np
+
+class SetupTestCase(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_log_grid(self):
+        grid = opcsim.LogGrid(dmin=0.1, dmax=10., n_bins=101)
+        bounds = grid.boundaries()
+
+        self.assertEqual(bounds.shape[0], 101)
+        self.assertAlmostEqual(bounds[0], 0.1)
+        self.assertAlmostEqual(bounds[-1], 10.)
+        self.assertTrue(np.allclose(np.diff(np.log10(bounds)), 0.02))
+
+        with self.assertRaises(ValueError):
+            opcsim.LogGrid(dmin=10., dmax=1.)
+
+    def test_quantile_grid(self):
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1000, gm=0.2, gsd=1.5, kappa=0.53, label="a")
+
+        grid = opcsim.QuantileGrid(n_bins=51, tail=1e-3)
+        bounds = grid.boundaries(mode=d.modes[0], rh=0.)
+
+        # every bin holds the same number of particles
+        n = np.diff(d.cdf(dmax=bounds))
+        self.assertTrue(np.allclose(n, n[0]))
+        self.assertAlmostEqual(n.sum(), 1000*(1 - 2e-3))
+
+        # the grid grows with the particles
+        wet = grid.boundaries(mode=d.modes[0], rh=90.)
+        self.assertTrue(np.all(wet > bounds))
+
+        with self.assertRaises(ValueError):
+            grid.boundaries()
+
+    def test_adaptive_grid(self):
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1000, gm=0.2, gsd=1.5, label="a")
+        d.add_mode(n=1000, gm=0.35, gsd=1.4, label="b")
+
+        grid = opcsim.AdaptiveGrid(n_per_decade=64, dmax=0.5)
+
+        a = grid.boundaries(mode=d.modes[0])
+        b = grid.boundaries(mode=d.modes[1])
+
+        # the boundaries lie on a shared lattice
+        self.assertTrue(np.allclose(np.log10(a)*64, np.round(np.log10(a)*64)))
+        self.assertTrue(np.all(np.isin(np.round(np.log10(b)*64), np.round(np.log10(a)*64))))
+
+        # and cover the span of the mode, up to dmax
+        self.assertLessEqual(a[0], 0.2/1.5**4)
+        self.assertAlmostEqual(a[-1], 0.5, places=2)
+
+        with self.assertRaises(ValueError):
+            grid.boundaries()
+
+    def test_opc_grids(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=5, dmin=0.3, dmax=2.5, grid=opcsim.LogGrid(0.15, 10., 250))
+        opc.calibrate(material="psl")
+
+        d = opcsim.load_distribution("urban")
+
+        # the results no longer depend on the total number of particles
+        d2 = opcsim.AerosolDistribution()
+
+        for m in d.modes:
+            d2.add_mode(n=m["N"]*1e-4, gm=m["GM"], gsd=m["GSD"], label=m["label"])
+
+        self.assertTrue(np.allclose(opc.evaluate(d2)*1e4, opc.evaluate(d)))
+
+        # the bounds/n_bins kwargs are shorthand for a LogGrid
+        self.assertTrue(np.allclose(opc.evaluate(d, bounds=(0.15, 10.), n_bins=250), opc.evaluate(d)))
+
+        # every grid should give about the same answer
+        ref = opc.evaluate(d)
+
+        for grid in [opcsim.QuantileGrid(n_bins=500), opcsim.AdaptiveGrid(dmax=10.)]:
+            vals = opc.evaluate(d, grid=grid)
+
+            self.assertLess(np.abs(vals - ref).sum() / ref.sum(), 0.1)
+
+            # grids that follow the modes are evaluated per RH
+            sweep = opc.evaluate(d, rh=[0., 50.], grid=grid)
+            self.assertTrue(np.allclose(sweep[0], vals))
+
+            with self.assertRaises(ValueError):
+                opc.evaluate_many(np.ones(2), np.ones(2), np.ones(2)*1.5, grid=grid)
+
+        # the response matrices of quantile grids are used once, so they are not cached
+        opc._response_matrices.clear()
+
+        for gm in np.linspace(0.2, 0.4, 10):
+            d2 = opcsim.AerosolDistribution()
+            d2.add_mode(n=1e3, gm=gm, gsd=1.5)
+
+            opc.evaluate(d2, grid=opcsim.QuantileGrid())
+
+        self.assertEqual(len(opc._response_matrices), 0)
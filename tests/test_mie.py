@@ -2,6 +2,8 @@ import unittest
 import opcsim
 import pandas as pd
 import numpy as np
+import os
+import tempfile
 
 from opcsim.distributions import *
 from opcsim.models import *
@@ -18,11 +20,56 @@ class SetupTestCase(unittest.TestCase):
         self.assertAlmostEqual(pi[0], 1.)
         self.assertAlmostEqual(0.86, round(tau[0], 2), places=1)
 
+    def test_coef_pi_tau_many(self):
+        thetas = np.array([10., 30., 75., 160.])
+        pi, tau = opcsim.mie.coef_pi_tau(theta=thetas, x=12.)
+
+        self.assertEqual(pi.shape, tau.shape)
+        self.assertEqual(pi.shape[0], thetas.shape[0])
+
+        # every row should match the scalar version
+        for i, t in enumerate(thetas):
+            p, ta = opcsim.mie.coef_pi_tau(theta=t, x=12.)
+            self.assertTrue(np.allclose(pi[i], p))
+            self.assertTrue(np.allclose(tau[i], ta))
+
     def test_coef_ab(self):
         a, b = opcsim.mie.coef_ab(refr=complex(1.5, 0), x=.5)
         self.assertAlmostEqual(a[0].real, 6.06e-4, places=2)
         self.assertAlmostEqual(b[0].real, 7.5e-7, places=2)
     
+    def test_coef_ab_large(self):
+        from scipy.special import spherical_jn, spherical_yn
+
+        for m, x in [(1.5, 50.), (complex(1.95, 0.79), 40.), (1.33, 300.)]:
+            a, b = opcsim.mie.coef_ab(refr=complex(m), x=x)
+            n = np.arange(1, a.shape[0] + 1)
+
+            # compute the exact values from the Riccati-Bessel functions
+            def psi(z, d=False):
+                return z*spherical_jn(n, z, derivative=True) + spherical_jn(n, z) if d else z*spherical_jn(n, z)
+
+            def xi(z, d=False):
+                yn = z*spherical_yn(n, z, derivative=True) + spherical_yn(n, z) if d else z*spherical_yn(n, z)
+                return psi(z, d) + 1j*yn
+
+            a_exp = (m*psi(m*x)*psi(x, True) - psi(x)*psi(m*x, True)) / (m*psi(m*x)*xi(x, True) - xi(x)*psi(m*x, True))
+            b_exp = (psi(m*x)*psi(x, True) - m*psi(x)*psi(m*x, True)) / (psi(m*x)*xi(x, True) - m*xi(x)*psi(m*x, True))
+
+            self.assertTrue(np.allclose(a, a_exp, atol=1e-8))
+            self.assertTrue(np.allclose(b, b_exp, atol=1e-8))
+
+    def test_lentz_dn(self):
+        from scipy.special import spherical_jn
+
+        # D_n(z) = psi_n'(z) / psi_n(z) for a batch of real z that converge at different rates
+        z = np.array([0.5, 5., 50., 500.])
+        n = 40
+
+        exact = 1. / z + spherical_jn(n, z, derivative=True) / spherical_jn(n, z)
+
+        self.assertTrue(np.allclose(opcsim.mie._lentz_dn(z, n), exact, rtol=1e-10))
+
     def test_s1s2(self):
         s1, s2 = opcsim.mie.s1s2(refr=complex(1.5, 0), x=.5, theta=30.)
         self.assertAlmostEqual(s1.real, 9.1e-4, places=2)
@@ -31,4 +78,216 @@ class SetupTestCase(unittest.TestCase):
     def test_cscat(self):
         rv = opcsim.mie.cscat(dp=0.5, wl=0.658, refr=complex(
             1.9, .5), theta1=32., theta2=88.)
-        self.assertTrue(type(rv), float)
\ No newline at end of file
+        self.assertTrue(type(rv), float)
+
+    def test_cscat_matches_s1s2(self):
+        dp, wl, refr = 1.2, 0.658, complex(1.59, 0.01)
+        x = dp*np.pi / wl
+        thetas = np.linspace(32., 88., 50)
+
+        # integrate the per-angle amplitudes explicitly
+        rv = np.zeros(thetas.shape[0])
+        for i, t in enumerate(thetas):
+            s1, s2 = opcsim.mie.s1s2(refr=refr, x=x, theta=t)
+            rv[i] = (np.abs(s1)**2 + np.abs(s2)**2) * np.sin(np.radians(t))
+
+        expected = ((wl*1e-4)**2 / (4*np.pi)) * np.trapz(rv, np.radians(thetas))
+
+        rv = opcsim.mie.cscat(dp=dp, wl=wl, refr=refr, theta1=32., theta2=88., nsteps=50)
+        self.assertAlmostEqual(rv / expected, 1., places=10)
+
+    def test_cscat_many(self):
+        dps = np.array([0.05, 0.3, 1.2, 4.5, 0.8])
+        refr = complex(1.59, 0.01)
+
+        rv = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=32., theta2=88., chunksize=2)
+        self.assertEqual(rv.shape, dps.shape)
+
+        for dp, v in zip(dps, rv):
+            expected = opcsim.mie.cscat(dp=dp, wl=0.658, refr=refr, theta1=32., theta2=88.)
+            self.assertAlmostEqual(v / expected, 1., places=5)
+
+        # an array of refractive indices
+        refrs = np.array([complex(1.5, 0), complex(1.95, 0.79)])
+        rv = opcsim.mie.cscat_many([1., 1.], wl=0.658, refr=refrs, theta1=32., theta2=88.)
+
+        self.assertAlmostEqual(rv[1] / opcsim.mie.cscat(
+            dp=1., wl=0.658, refr=refrs[1], theta1=32., theta2=88.), 1., places=5)
+
+    def test_cscat_table(self):
+        table = opcsim.mie.CscatTable(wl=0.658, theta=(32., 88.), dmin=0.2, dmax=2., 
+                                      n_per_decade=200, refr_real=[1.5, 1.6], refr_imag=[0.])
+
+        self.assertIsNotNone(table.error)
+
+        dps = np.logspace(np.log10(0.25), np.log10(1.8), 20)
+
+        # diameters between the nodes at a refractive index on the grid
+        expected = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.5, 0), theta1=32., theta2=88.)
+        rv = table(dps, refr=complex(1.5, 0))
+
+        self.assertTrue(np.all(np.abs(rv / expected - 1) < 0.01))
+
+        # refractive indices between the nodes should be within the estimated error
+        expected = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.55, 0), theta1=32., theta2=88.)
+        rv = table(dps, refr=complex(1.55, 0))
+
+        self.assertTrue(np.all(np.abs(rv / expected - 1) <= table.error))
+
+        # values outside of the table fall back to Mie theory
+        rv = table([5.], refr=complex(1.55, 0))
+        self.assertAlmostEqual(rv[0] / opcsim.mie.cscat(
+            dp=5., wl=0.658, refr=complex(1.55, 0), theta1=32., theta2=88.), 1., places=5)
+
+        # save and re-load the table
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = os.path.join(tmpdir, "table.npz")
+            table.save(fpath)
+
+            loaded = opcsim.mie.CscatTable.load(fpath)
+
+        self.assertEqual(loaded.theta, table.theta)
+        self.assertEqual(loaded.error, table.error)
+        self.assertTrue(np.allclose(loaded(dps, refr=complex(1.55, 0)), table(dps, refr=complex(1.55, 0))))
+
+        # a scalar diameter outside of the table
+        rv = table(5., refr=complex(1.55, 0))
+        self.assertEqual(np.shape(rv), ())
+        self.assertAlmostEqual(float(rv) / opcsim.mie.cscat(
+            dp=5., wl=0.658, refr=complex(1.55, 0), theta1=32., theta2=88.), 1., places=5)
+
+        # absorbing particles anywhere within the cells are within the estimated error
+        table = opcsim.mie.CscatTable(wl=0.658, theta=(32., 88.), dmin=0.2, dmax=2., 
+                                      refr_real=[1.5, 1.6], refr_imag=[0., 0.01, 0.1, 1.])
+
+        rng = np.random.default_rng(0)
+        dps = 10**rng.uniform(np.log10(0.2), np.log10(2.), 200)
+        refr = rng.uniform(1.5, 1.6, 200) + 1j*10**rng.uniform(-4, 0, 200)
+
+        expected = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=32., theta2=88.)
+        self.assertTrue(np.all(np.abs(table(dps, refr=refr) / expected - 1) <= table.error))
+
+    def test_cscat_cache(self):
+        cache = opcsim.mie.CscatCache(maxsize=5)
+        dps = np.array([0.3, 0.5, 0.8])
+
+        rv = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.59, 0), theta1=32., theta2=88., cache=cache)
+        info = cache.cache_info()
+
+        self.assertEqual(info.hits, 0)
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.currsize, 3)
+
+        # the same values (up to floating point noise) should be served from the cache
+        rv2 = opcsim.mie.cscat_many(dps*(1 + 1e-13), wl=0.658, refr=complex(1.59, 0), theta1=32., 
+                                    theta2=88., cache=cache)
+
+        self.assertTrue(np.array_equal(rv, rv2))
+        self.assertEqual(cache.cache_info().hits, 3)
+
+        # a different angle is a different entry and the least recently used are evicted
+        opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.59, 0), theta1=30., theta2=90., cache=cache)
+        self.assertEqual(cache.cache_info().currsize, 5)
+
+        cache.cache_clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 5, 0))
+
+        # repeated particles are computed once and served to every copy
+        rv3 = opcsim.mie.cscat_many(np.tile(dps, (4, 1)), wl=0.658, refr=complex(1.59, 0), theta1=32., 
+                                    theta2=88., cache=cache)
+
+        self.assertTrue(np.array_equal(rv3, np.tile(rv, (4, 1))))
+        self.assertEqual(cache.cache_info(), (0, 12, 5, 3))
+
+        # a batch larger than the cache bypasses it rather than evicting its own entries
+        big = np.linspace(1., 2., 10)
+        rv4 = opcsim.mie.cscat_many(big, wl=0.658, refr=complex(1.59, 0), theta1=32., theta2=88., cache=cache)
+
+        self.assertTrue(np.array_equal(rv4, opcsim.mie.cscat_many(big, wl=0.658, refr=complex(1.59, 0), 
+                                                                  theta1=32., theta2=88.)))
+        self.assertEqual(cache.cache_info(), (0, 22, 5, 3))
+
+    def test_cscat_gauss(self):
+        dps = np.array([0.1, 0.8, 3.5, 12.])
+
+        # compare against a very fine trapezoidal integration
+        expected = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.59, 0), theta1=7., 
+                                         theta2=173., nsteps=20000)
+
+        rv = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.59, 0), theta1=7., theta2=173.,
+                                   quadrature="gauss", rtol=1e-5)
+
+        self.assertTrue(np.all(np.abs(rv / expected - 1) < 1e-5))
+
+        rv = opcsim.mie.cscat(dp=0.8, wl=0.658, refr=complex(1.59, 0), theta1=7., theta2=173.,
+                              quadrature="gauss")
+        self.assertAlmostEqual(rv / expected[1], 1., places=5)
+
+        with self.assertRaises(ValueError):
+            opcsim.mie.cscat(dp=0.8, wl=0.658, refr=complex(1.59, 0), theta1=7., theta2=173.,
+                             quadrature="simpson")
+
+    def test_efficiencies(self):
+        dps = np.array([0.1, 0.5, 2., 6.])
+
+        qsca, qext, qabs, qback, g = opcsim.mie.efficiencies(dps, wl=0.658, refr=complex(1.5, 0.01))
+
+        self.assertEqual(qsca.shape, dps.shape)
+        self.assertTrue(np.allclose(qabs, qext - qsca))
+        self.assertTrue(np.all(qabs > 0))
+        self.assertTrue(np.all((g > 0) & (g < 1)))
+
+        # the scattering efficiency should match the integral over the full sphere
+        full = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.5, 0.01), theta1=0., theta2=180.,
+                                     quadrature="gauss")
+
+        self.assertTrue(np.allclose(full, qsca * np.pi * (dps*1e-4)**2 / 4., rtol=1e-6))
+
+        # non-absorbing particles don't absorb
+        qsca, qext, qabs, qback, g = opcsim.mie.efficiencies(1., wl=0.658, refr=complex(1.5, 0))
+        self.assertAlmostEqual(float(qabs), 0., places=10)
+
+        # the full sphere minus the truncated wedges matches the direct integral
+        dps = np.logspace(-1, 1, 50)
+        direct = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.5, 0.01), theta1=7., theta2=173., 
+                                       quadrature="gauss", rtol=1e-10)
+        trunc = opcsim.mie.cscat_many(dps, wl=0.658, refr=complex(1.5, 0.01), theta1=7., theta2=173., 
+                                      quadrature="gauss", method="truncation")
+
+        self.assertTrue(np.allclose(trunc, direct, rtol=1e-8))
+
+        with self.assertRaises(ValueError):
+            opcsim.mie.cscat_many(dps, wl=0.658, refr=1.5, theta1=7., theta2=173., method="unknown")
+
+    def test_cscat_approx(self):
+        dps = np.linspace(21., 42., 25)
+        refr = complex(1.59, 0)
+
+        # x is between 100 and 200 at this wavelength
+        mie = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=32., theta2=88., quadrature="gauss")
+        approx = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=32., theta2=88., 
+                                       quadrature="gauss", approx_threshold=100.)
+
+        self.assertTrue(np.allclose(approx, mie, rtol=0.1))
+
+        # windows that only see side or back scattering always use Mie theory
+        for theta1, theta2 in [(60., 120.), (90., 150.)]:
+            self.assertTrue(np.allclose(
+                opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=theta1, theta2=theta2, 
+                                      quadrature="gauss", approx_threshold=100.),
+                opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=theta1, theta2=theta2, 
+                                      quadrature="gauss"), rtol=1e-12))
+
+        # particles below the threshold still use Mie theory
+        small = np.array([0.5, 1., 5.])
+        self.assertTrue(np.allclose(
+            opcsim.mie.cscat_many(small, wl=0.658, refr=refr, theta1=32., theta2=88., approx_threshold=100.),
+            opcsim.mie.cscat_many(small, wl=0.658, refr=refr, theta1=32., theta2=88.), rtol=1e-12))
+
+        # absorbing particles
+        refr = complex(1.73, 0.086)
+        mie = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=7., theta2=173., quadrature="gauss")
+        approx = opcsim.mie.cscat_many(dps, wl=0.658, refr=refr, theta1=7., theta2=173., 
+                                       quadrature="gauss", approx_threshold=100.)
+
+        self.assertTrue(np.allclose(approx, mie, rtol=0.1))
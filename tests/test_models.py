@@ -1,4 +1,5 @@
 import unittest
+import io
 import opcsim
 import pandas as pd
 import numpy as np
@@ -125,6 +126,193 @@ class SetupTestCase(unittest.TestCase):
         # test the histogram
         h = opc.evaluate(d)
 
+        # a second evaluation should be served from the cache
+        misses = opc.cache.cache_info().misses
+        h2 = opc.evaluate(d)
+
+        self.assertTrue(np.array_equal(h, h2))
+        self.assertEqual(opc.cache.cache_info().misses, misses)
+
+    def test_opc_rh_sweep(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3, dmax=10., theta=(32., 88.))
+        opc.calibrate(material="psl")
+
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e3, gm=0.4, gsd=1.5, kappa=0.53, rho=1.77, refr=complex(1.521, 0))
+
+        rh = np.array([0., 50., 85.])
+
+        vals = opc.evaluate(d, rh=rh)
+        hist = opc.histogram(d, weight="volume", rh=rh)
+        pm = opc.integrate(d, dmax=2.5, weight="mass", rh=rh)
+
+        self.assertEqual(vals.shape, (3, 10))
+        self.assertEqual(hist.shape, (3, 10))
+        self.assertEqual(pm.shape, (3, ))
+
+        for i, each in enumerate(rh):
+            self.assertTrue(np.allclose(vals[i], opc.evaluate(d, rh=each)))
+            self.assertTrue(np.allclose(hist[i], opc.histogram(d, weight="volume", rh=each)))
+            self.assertAlmostEqual(pm[i], opc.integrate(d, dmax=2.5, weight="mass", rh=each))
+
+    def test_opc_evaluate_many(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3, dmax=10., theta=(32., 88.))
+
+        n = np.array([[1e3, 10.], [2e3, 15.], [5e2, 5.]])
+        gm = np.array([[0.1, 1.], [0.15, 1.2], [0.2, 0.8]])
+        gsd = np.array([[1.5, 1.8], [1.6, 1.7], [1.4, 2.]])
+        rh = np.array([0., 50., 85.])
+        kappa = [0.53, 0.1]
+        refr = [complex(1.521, 0), complex(1.55, 0.01)]
+
+        with self.assertRaises(Exception):
+            opc.evaluate_many(n, gm, gsd)
+
+        opc.calibrate(material="psl")
+
+        vals = opc.evaluate_many(n, gm, gsd, rh=rh, kappa=kappa, refr=refr)
+        self.assertEqual(vals.shape, (3, 10))
+
+        # every row should match a call to evaluate
+        for i in range(3):
+            d = opcsim.AerosolDistribution()
+
+            for j in range(2):
+                d.add_mode(n=n[i, j], gm=gm[i, j], gsd=gsd[i, j], kappa=kappa[j], 
+                           refr=refr[j], label=str(j))
+
+            self.assertTrue(np.allclose(vals[i], opc.evaluate(d, rh=rh[i], n_bins=250)))
+
+        # a DataFrame works too
+        df = pd.DataFrame({"N_1": n[:, 0], "GM_1": gm[:, 0], "GSD_1": gsd[:, 0], 
+                           "N_2": n[:, 1], "GM_2": gm[:, 1], "GSD_2": gsd[:, 1], "rh": rh})
+
+        self.assertTrue(np.allclose(opc.evaluate_many(df, kappa=kappa, refr=refr), vals))
+
+        # processing the rows in chunks gives the same result
+        self.assertTrue(np.allclose(opc.evaluate_many(n, gm, gsd, rh=rh, kappa=kappa, refr=refr, 
+                                                      chunksize=2), vals))
+
+        # an RH that changes on every row is interpolated on a lattice of wet refractive indices
+        rh = np.linspace(0., 95., 500)
+        n, gm, gsd = [np.repeat(each[:1], 500, axis=0) for each in (n, gm, gsd)]
+
+        exact = opc.evaluate_many(n, gm, gsd, rh=rh, kappa=kappa, refr=refr, n_bins=50, n_lattice=10**6)
+        vals = opc.evaluate_many(n, gm, gsd, rh=rh, kappa=kappa, refr=refr, n_bins=50)
+
+        self.assertTrue(np.allclose(vals, exact, rtol=1e-6))
+
+        # a distribution without any modes has no particles at any RH
+        empty = opcsim.AerosolDistribution()
+
+        self.assertTrue(np.array_equal(opc.evaluate(empty, rh=0.), np.zeros(10)))
+        self.assertTrue(np.array_equal(opc.evaluate(empty, rh=[0., 50.]), np.zeros((2, 10))))
+
+    def test_opc_response_matrix(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3, dmax=10., theta=(32., 88.))
+
+        with self.assertRaises(Exception):
+            opc.response_matrix(refr=complex(1.5, 0))
+
+        opc.calibrate(material="psl")
+
+        grid = np.logspace(-1, 1, 200)
+        K = opc.response_matrix(refr=complex(1.5, 0), grid=grid)
+
+        self.assertEqual(K.shape, (199, 10))
+        self.assertTrue(np.all(K.sum(axis=1) <= 1.))
+
+        # the matrix is cached on the instance
+        self.assertIs(opc.response_matrix(refr=complex(1.5, 0), grid=grid), K)
+
+        # and evaluating a distribution is just a mat-vec against it
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e3, gm=0.4, gsd=1.5, rho=1.6, refr=complex(1.5, 0))
+
+        n = np.diff(d.cdf(dmax=grid))
+        self.assertTrue(np.allclose(opc.evaluate(d, bounds=(0.1, 10.), n_bins=200), n @ K))
+
+        # re-calibrating throws away the cached matrices
+        opc.calibrate(material="psl", method="linear")
+        self.assertIsNot(opc.response_matrix(refr=complex(1.5, 0), grid=grid), K)
+
+        # so does changing a setting that changes Cscat
+        K = opc.response_matrix(refr=complex(1.5, 0), grid=grid)
+        self.assertIs(opc.response_matrix(refr=complex(1.5, 0), grid=grid), K)
+
+        opc.approx_threshold = 100.
+        self.assertIsNot(opc.response_matrix(refr=complex(1.5, 0), grid=grid), K)
+
+        # the cache is bounded and drops the least recently used matrices first
+        opc = opcsim.OPC(wl=0.658, n_bins=5, max_response_matrices=3)
+        opc.calibrate(material="psl")
+
+        first = opc.response_matrix(refr=complex(1.5, 0), rh=0.)
+        for rh in np.linspace(10., 90., 20):
+            opc.response_matrix(refr=complex(1.5, 0), rh=rh)
+
+        self.assertEqual(len(opc._response_matrices), 3)
+        self.assertIsNot(opc.response_matrix(refr=complex(1.5, 0), rh=0.), first)
+
+        # and only the cached matrices are saved
+        buf = io.BytesIO()
+        opc.save(buf)
+        buf.seek(0)
+
+        self.assertEqual(len(opcsim.OPC.load(buf)._response_matrices), 3)
+
+        # matrices can also be computed without touching the cache
+        opc.response_matrix(refr=complex(1.6, 0), rh=0., cache=False)
+        self.assertEqual(len(opc._response_matrices), 3)
+
+    def test_opc_invert(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3)
+        opc.calibrate(material="psl")
+
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e3, gm=0.25, gsd=1.5, kappa=0.53, refr=complex(1.521, 0))
+        d.add_mode(n=5., gm=1.5, gsd=1.6, kappa=0.53, refr=complex(1.521, 0))
+
+        counts = opc.evaluate(d, rh=50.)
+
+        fit = opc.invert(counts, n_modes=2, refr=complex(1.521, 0), kappa=0.53, rh=50.)
+
+        self.assertIsInstance(fit, opcsim.AerosolDistribution)
+
+        for m, truth in zip(fit.modes, d.modes):
+            self.assertAlmostEqual(m["N"] / truth["N"], 1., places=4)
+            self.assertAlmostEqual(m["GM"], truth["GM"], places=4)
+            self.assertAlmostEqual(m["GSD"], truth["GSD"], places=4)
+
+        # invert a time series with one RH per row
+        rh = np.array([0., 50.])
+        counts = opc.evaluate(d, rh=rh)
+
+        fits = opc.invert(counts, n_modes=2, refr=complex(1.521, 0), kappa=0.53, rh=rh)
+
+        self.assertEqual(len(fits), 2)
+        self.assertAlmostEqual(fits[0].modes[0]["GM"], 0.25, places=4)
+
+        # the per-row matrices are not kept on the OPC
+        opc._response_matrices.clear()
+        opc.invert(opc.evaluate(d, rh=np.linspace(0., 90., 5)), n_modes=2, refr=complex(1.521, 0), 
+                   kappa=0.53, rh=np.linspace(0., 90., 5))
+
+        self.assertEqual(len(opc._response_matrices), 0)
+
+        # an empty row in the middle of a time series gives an empty distribution
+        counts = np.insert(counts, 1, 0., axis=0)
+        fits = opc.invert(counts, n_modes=2, refr=complex(1.521, 0), kappa=0.53, rh=[0., 25., 50.])
+
+        self.assertEqual([len(f.modes) for f in fits], [2, 0, 2])
+        self.assertAlmostEqual(fits[2].modes[0]["GM"], 0.25, places=4)
+
+        with self.assertRaises(ValueError):
+            opc.invert(np.zeros(10))
+
+        with self.assertRaises(ValueError):
+            opc.invert(np.ones(5))
+
     def test_opc_histogram(self):
         n_bins = 10
         dmin = 0.3
@@ -187,6 +375,11 @@ class SetupTestCase(unittest.TestCase):
         self.assertGreaterEqual(n3, n1)
         self.assertGreaterEqual(n3, n2)
 
+        # scalar breakpoints return a float, arrays return one value per breakpoint
+        self.assertIsInstance(n1, float)
+        self.assertIsInstance(opc.integrate(np.ones(n_bins), dmax=1.), float)
+        self.assertEqual(opc.integrate(d, dmax=[1., 2.5]).shape, (2,))
+
         # force a value error
         with self.assertRaises(ValueError):
             n1 = opc.integrate(d, dmin=0., dmax=1., weight="bad-weight")
@@ -202,6 +395,123 @@ class SetupTestCase(unittest.TestCase):
         n2 = opc.integrate(d, dmin=0., dmax=1., weight="volume")
         n3 = opc.integrate(d, dmin=0., dmax=1., weight="mass", rho=1.5)
 
+        # a range within the OPC counts a fraction of the bins it overlaps
+        self.assertGreater(opc.integrate(d, dmin=.61, dmax=.62), 0.)
+
+        vals = opc.evaluate(d)
+        b = opc.bins[4]
+        self.assertAlmostEqual(opc.integrate(d, dmin=0., dmax=b[1]) - opc.integrate(d, dmin=0., dmax=b[0]), 
+                               vals[4] * (b[1] - b[0]) / (b[2] - b[0]))
+
+        # compute many breakpoints for many RH's at once
+        rh = np.array([0., 50., 95.])
+        pm = opc.integrate(d, dmax=[1., 2.5, 10.], weight="mass", rh=rh, rho=1.5)
+
+        self.assertEqual(pm.shape, (3, 3))
+        self.assertAlmostEqual(pm[1, 1], opc.integrate(d, dmax=2.5, weight="mass", rh=50., rho=1.5))
+
+        # or integrate a batch of histograms
+        counts = opc.evaluate(d, rh=rh)
+        self.assertTrue(np.allclose(opc.integrate(counts, dmax=[1., 2.5, 10.], weight="mass", rho=1.5), pm))
+
+        with self.assertRaises(ValueError):
+            opc.integrate(np.ones(3))
+
+    def test_opc_cscat_table(self):
+        table = opcsim.mie.CscatTable(wl=0.658, theta=(32., 88.), dmin=0.1, dmax=12.,
+                                      refr_real=[1.5, 1.59], refr_imag=[0.])
+
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e3, gm=0.4, gsd=1.5, rho=1.6, refr=complex(1.5, 0))
+
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3, dmax=10., theta=(32., 88.), cscat_table=table)
+        opc.calibrate(material="psl")
+
+        self.assertEqual(opc.evaluate(d).shape[0], opc.n_bins)
+
+        neph = opcsim.Nephelometer(wl=0.658, theta=(32., 88.), cscat_table=table)
+        neph.calibrate(d)
+
+        self.assertIsNotNone(neph.pm1_ratio)
+
+        # the table must match the instrument
+        with self.assertRaises(ValueError):
+            opcsim.OPC(wl=0.5, cscat_table=table)
+
+    def test_save_load(self):
+        d = opcsim.load_distribution("urban")
+
+        opc = opcsim.OPC(wl=0.658, n_bins=5, label="test", grid=opcsim.AdaptiveGrid(dmax=10.))
+        opc.calibrate(material="psl")
+
+        vals = opc.evaluate(d, rh=50.)
+
+        buf = io.BytesIO()
+        opc.save(buf)
+        buf.seek(0)
+
+        opc2 = opcsim.OPC.load(buf)
+
+        self.assertEqual(opc2.label, "test")
+        self.assertEqual(opc2.calibration_refr, opc.calibration_refr)
+        self.assertTrue(np.array_equal(opc2.bins, opc.bins))
+
+        # the saved response matrices mean no new Mie calculations are needed
+        self.assertTrue(np.array_equal(opc2.evaluate(d, rh=50.), vals))
+        self.assertEqual(opc2.cache.cache_info().misses, 0)
+
+        neph = opcsim.Nephelometer(wl=0.658, method="truncation")
+        neph.calibrate(d)
+
+        buf = io.BytesIO()
+        neph.save(buf)
+        buf.seek(0)
+
+        neph2 = opcsim.Nephelometer.load(buf)
+
+        self.assertEqual(neph2.method, "truncation")
+        self.assertEqual(neph2.evaluate(d, rh=50.), neph.evaluate(d, rh=50.))
+
+        # files from an unknown version are rejected
+        buf = io.BytesIO()
+        np.savez(buf, version=99, settings="{}")
+        buf.seek(0)
+
+        with self.assertRaises(ValueError):
+            opcsim.OPC.load(buf)
+
+    def test_ensemble(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=10, dmin=0.3)
+        opc.calibrate(material="psl")
+
+        n = np.column_stack((np.full(5, 1e3), np.linspace(1., 10., 5)))
+        gm = np.column_stack((np.linspace(0.1, 0.3, 5), np.full(5, 1.5)))
+        gsd = np.tile([1.5, 1.8], (5, 1))
+
+        e = opcsim.DistributionEnsemble(n, gm, gsd, kappa=[0.53, 0.], rho=1.5, 
+                                        refr=[complex(1.521, 0), complex(1.55, 0.01)])
+
+        vals = opc.evaluate(e, rh=50.)
+
+        self.assertEqual(vals.shape, (5, opc.n_bins))
+        self.assertTrue(np.allclose(vals[2], opc.evaluate(e[2], rh=50.)))
+
+        self.assertEqual(opc.histogram(e).shape, (5, opc.n_bins))
+
+        pm = opc.integrate(e, dmax=[1., 2.5], weight="mass", rho=1.5)
+        self.assertAlmostEqual(pm[4, 1], opc.integrate(e[4], dmax=2.5, weight="mass", rho=1.5))
+
+        neph = opcsim.Nephelometer(wl=0.658)
+        neph.calibrate(e[0])
+
+        cscat, pm1, pm25, pm10 = neph.evaluate(e, rh=50.)
+
+        self.assertEqual(cscat.shape, (5, ))
+
+        # every distribution is discretized the same way on its own as in the ensemble
+        for i in range(5):
+            self.assertTrue(np.isclose(cscat[i], neph.evaluate(e[i], rh=50.)[0], rtol=1e-6, atol=0))
+
     def test_nephelometer(self):
         neph = opcsim.Nephelometer(wl=0.658, theta=(7., 173.))
 
@@ -227,3 +537,20 @@ class SetupTestCase(unittest.TestCase):
         self.assertGreaterEqual(vals2[2], vals[2])
         self.assertGreaterEqual(vals2[3], vals[3])
 
+        # the full-sphere minus truncated wedges should agree with the direct method
+        neph2 = opcsim.Nephelometer(wl=0.658, theta=(7., 173.), method="truncation")
+        neph2.calibrate(d, rh=0.)
+
+        vals3 = neph2.evaluate(d, rh=95.)
+        self.assertAlmostEqual(vals3[0] / vals2[0], 1., places=2)
+
+        with self.assertRaises(ValueError):
+            opcsim.Nephelometer(wl=0.658, method="unknown")
+
+        # evaluate a sweep of RH's at once
+        rh = np.array([0., 50., 95.])
+        sweep = neph.evaluate(d, rh=rh)
+
+        for i, v in enumerate([vals, neph.evaluate(d, rh=50.), vals2]):
+            self.assertTrue(np.allclose([each[i] for each in sweep], v))
+
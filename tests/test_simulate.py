@@ -0,0 +1,98 @@
+import unittest
+import opcsim
+import numpy as np
+
+class SetupTestCase(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_iter_pulses(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=5, dmin=0.3, dmax=2.5)
+        d = opcsim.load_distribution("urban")
+
+        with self.assertRaises(Exception):
+            next(opcsim.simulate.iter_pulses(opc, d, volume=1.))
+
+        opc.calibrate(material="psl")
+
+        chunks = list(opcsim.simulate.iter_pulses(opc, d, volume=0.01, chunksize=500, seed=0))
+
+        # every chunk but the last is full
+        self.assertTrue(all(len(c.dp) == 500 for c in chunks[:-1]))
+        self.assertLessEqual(len(chunks[-1].dp), 500)
+
+        # the number of particles is close to the expected number
+        ntot = sum(len(c.dp) for c in chunks)
+        expected = d.cdf(dmax=100.) * 0.01
+
+        self.assertLess(abs(ntot - expected), 5*np.sqrt(expected))
+
+        # without noise, the signal is the scattering cross-section
+        self.assertTrue(np.array_equal(chunks[0].signal, chunks[0].cscat))
+        self.assertTrue(np.all(chunks[0].bins >= -1))
+        self.assertTrue(np.all(chunks[0].bins < 5))
+
+        # an ADC quantizes the signal
+        chunk = next(opcsim.simulate.iter_pulses(opc, d, volume=0.01, seed=0, adc_bits=8, noise=0.1))
+        lsb = opc._cscat_boundaries[-1] / 2**8
+
+        self.assertTrue(np.allclose(chunk.signal / lsb, np.round(chunk.signal / lsb)))
+        self.assertLessEqual(chunk.signal.max(), opc._cscat_boundaries[-1])
+
+    def test_simulate_counts(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=5, dmin=0.3, dmax=2.5)
+        opc.calibrate(material="psl")
+
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1000, gm=0.5, gsd=1.6, refr=complex(1.59, 0))
+
+        counts = opcsim.simulate.simulate_counts(opc, d, volume=20., seed=1, chunksize=5000)
+        expected = opc.evaluate(d, bounds=(0.15, 10.), n_bins=4000) * 20.
+
+        # within counting statistics
+        self.assertTrue(np.all(np.abs(counts - expected) < 5*np.sqrt(expected) + 5))
+
+        # the results are reproducible
+        counts2 = opcsim.simulate.simulate_counts(opc, d, volume=20., seed=1, chunksize=5000)
+        self.assertTrue(np.array_equal(counts, counts2))
+
+    def test_simulate_coincidence(self):
+        opc = opcsim.OPC(wl=0.658, n_bins=5, dmin=0.3, dmax=2.5)
+
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1e4, gm=0.5, gsd=1.5, refr=complex(1.59, 0))
+
+        with self.assertRaises(Exception):
+            opcsim.simulate.simulate_coincidence(opc, d, flow_rate=1., duration=1.)
+
+        opc.calibrate(material="psl")
+
+        flow_rate, transit_time, dead_time = 1000./60, 2e-6, 5e-6
+        rate = 1e4 * flow_rate
+
+        for chunksize in [50, 100000]:
+            rv = opcsim.simulate.simulate_coincidence(opc, d, flow_rate=flow_rate, duration=0.2, 
+                                                      transit_time=transit_time, dead_time=dead_time, 
+                                                      chunksize=chunksize, seed=0)
+
+            self.assertLess(abs(rv.arrived - rate*0.2), 5*np.sqrt(rate*0.2))
+            self.assertLessEqual(rv.counts.sum(), rv.registered)
+
+            # a paralyzable detector registers exp(-rate * (transit + dead time)) of the particles
+            self.assertAlmostEqual(rv.registered / rv.arrived, 
+                                   np.exp(-rate*(transit_time + dead_time)), delta=0.02)
+
+        # coincident particles are sized as larger particles
+        ideal = opc.evaluate(d)
+        self.assertGreater(rv.counts[-1] / rv.counts.sum(), ideal[-1] / ideal.sum())
+
+        # at low concentrations, nothing is lost
+        d = opcsim.AerosolDistribution()
+        d.add_mode(n=1., gm=0.5, gsd=1.5)
+
+        rv = opcsim.simulate.simulate_coincidence(opc, d, flow_rate=flow_rate, duration=10., 
+                                                  transit_time=1e-9, seed=0)
+        self.assertEqual(rv.arrived, rv.registered)
@@ -67,6 +67,30 @@ class SetupTestCase(unittest.TestCase):
             species=[complex(1.5, 0), complex(2.0, 1.0)], weights=[0.5, 0.5])
         self.assertEqual(r1, complex(1.75, 0.5))
 
+    def test_mixing_arrays(self):
+        # broadcast over particles x RH's with the species on the last axis
+        pct_dry = np.linspace(0.1, 1., 12).reshape(3, 4)
+        weights = np.stack([pct_dry, 1 - pct_dry], axis=-1)
+
+        ri = opcsim.utils.ri_eff([complex(1.5, 0.1), complex(1.333, 0)], weights=weights)
+
+        self.assertEqual(ri.shape, (3, 4))
+        self.assertEqual(ri[1, 2], opcsim.utils.ri_eff([complex(1.5, 0.1), complex(1.333, 0)], 
+                                                       weights=[pct_dry[1, 2], 1 - pct_dry[1, 2]]))
+
+        rho = opcsim.utils.rho_eff([1.77, 1.], weights=weights)
+        self.assertTrue(np.allclose(rho, 1.77*pct_dry + (1 - pct_dry)))
+
+        diams = np.array([[1., 0.], [1., 1.], [1., 2.]])
+        self.assertTrue(np.allclose(opcsim.utils.k_eff([0.5, 0.], diams=diams), [0.5, 0.25, 0.5/9.]))
+
+        # the wet diameter of many particles at many RH's at once
+        wet = opcsim.utils.k_kohler(diam_dry=np.array([0.1, 0.2])[:, None], kappa=0.53, 
+                                    rh=np.array([0., 50., 90.]))
+
+        self.assertEqual(wet.shape, (2, 3))
+        self.assertEqual(wet[1, 0], 0.2)
+
     def power_law_fit(self):
         xs = np.linspace(1, 10, 10)
         a, b = 2, 0.1